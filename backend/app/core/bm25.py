@@ -0,0 +1,102 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+from app.sources.base import ContentItem
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 relevance of items against a run's keywords, scaled to 0-1.
+
+    Each keyword is one query term; multi-word keywords only count where
+    their tokens appear consecutively (non-overlapping occurrences). Items
+    are tokenized once into term counts, and phrases are counted over the
+    joined tokens. The run-level index holds document frequencies and
+    lengths, so scoring stays linear in total tokens. Batches can be indexed
+    as sources finish; scores depend on the statistics of every item indexed
+    so far, so items compare exactly only when scored after the last batch.
+    """
+
+    def __init__(self, keywords: list[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        weights: dict[tuple[str, ...], int] = {}
+        for kw in keywords:
+            phrase = tuple(tokenize(kw))
+            if phrase:
+                # Repeated keywords weigh once per occurrence, as in the substring scorer.
+                weights[phrase] = weights.get(phrase, 0) + 1
+        self.phrases = list(weights)
+        self.weights = np.array(list(weights.values()), dtype=float)
+        self._has_phrases = any(len(phrase) > 1 for phrase in self.phrases)
+        self.doc_count = 0
+        self.total_length = 0
+        self.doc_freq = np.zeros(len(self.phrases))
+
+    def add(self, items: list[ContentItem]) -> np.ndarray:
+        """Index a batch and return each item's relevance in [0, 1]."""
+        return self.score(*self.index(items))
+
+    def index(self, items: list[ContentItem]) -> tuple[np.ndarray, np.ndarray]:
+        """Tokenize a batch into the run statistics; returns its (term frequencies, lengths) for ``score``."""
+        tf = np.zeros((len(items), len(self.phrases)))
+        lengths = np.zeros(len(items))
+        if not self.phrases:
+            return tf, lengths
+        for row, item in enumerate(items):
+            tokens = tokenize(f"{item.title} {item.extracted_text}")
+            lengths[row] = len(tokens)
+            tf[row] = self._term_frequencies(tokens)
+
+        self.doc_count += len(items)
+        self.total_length += int(lengths.sum())
+        self.doc_freq += (tf > 0).sum(axis=0)
+        return tf, lengths
+
+    def forget(self, tf: np.ndarray, lengths: np.ndarray) -> None:
+        """Take items returned by ``index`` back out of the run statistics, e.g. before re-indexing them."""
+        if not self.phrases or not len(lengths):
+            return
+        self.doc_count -= len(lengths)
+        self.total_length -= int(lengths.sum())
+        self.doc_freq -= (tf > 0).sum(axis=0)
+
+    def score(self, tf: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Relevance in [0, 1] of indexed items against the statistics as they stand now."""
+        if not self.phrases:
+            return np.full(len(lengths), 0.5)
+        if not len(lengths):
+            return np.zeros(0)
+        idf = np.log(1 + (self.doc_count - self.doc_freq + 0.5) / (self.doc_freq + 0.5))
+        avg_length = self.total_length / self.doc_count or 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / avg_length)
+        saturated = tf * (self.k1 + 1) / (tf + norm[:, None])
+        scores = saturated @ (idf * self.weights)
+        # A document that saturates every term scores idf * (k1 + 1) per term.
+        ceiling = float((idf * self.weights).sum() * (self.k1 + 1))
+        return scores / ceiling if ceiling > 0 else np.zeros(len(lengths))
+
+    def _term_frequencies(self, tokens: list[str]) -> list[int]:
+        counts = Counter(tokens)
+        # Tokens joined and padded by two spaces, so " a  b " can only match whole, adjacent tokens
+        # and back-to-back occurrences each keep a space of their own for str.count.
+        joined = f"  {'  '.join(tokens)}  " if self._has_phrases else ""
+        frequencies = []
+        for phrase in self.phrases:
+            if len(phrase) == 1:
+                frequencies.append(counts[phrase[0]])
+            elif all(counts[token] for token in phrase):
+                frequencies.append(joined.count(f" {'  '.join(phrase)} "))
+            else:
+                frequencies.append(0)
+        return frequencies
@@ -0,0 +1,144 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.db import DATA_DIR, connect
+
+CACHE_DB_PATH = os.path.join(DATA_DIR, "cache.sqlite3")
+# Most rows one namespace keeps on disk; the entries closest to expiry go first.
+CACHE_MAX_DISK_ENTRIES = int(os.getenv("CACHE_MAX_DISK_ENTRIES", "20000"))
+# Expired and surplus rows are swept on every this many writes to a namespace.
+_SWEEP_EVERY = 64
+
+_conns: dict[str, Any] = {}
+_conns_lock = threading.Lock()
+
+
+def _shared_conn(path: str):
+    with _conns_lock:
+        conn = _conns.get(path)
+        if conn is None:
+            conn = connect(path)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_expiry ON entries(namespace, expires_at)")
+            _conns[path] = conn
+        return conn
+
+
+class TieredCache:
+    """Two-tier TTL cache: a bounded in-memory LRU in front of a SQLite table.
+
+    Values must be JSON-serializable. Entries are namespaced so several
+    caches can share one database file. Expired rows are deleted when read,
+    and every few writes a sweep deletes the rest along with the rows past
+    ``max_disk_entries``, so the table stays bounded.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        max_entries: int = 256,
+        path: str = CACHE_DB_PATH,
+        max_disk_entries: int = CACHE_MAX_DISK_ENTRIES,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max(1, max_disk_entries)
+        self._writes = 0
+        self._path = path
+        self._memory: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return copy.deepcopy(entry[1])
+                del self._memory[key]
+
+        conn = _shared_conn(self._path)
+        row = conn.execute(
+            "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None or row["expires_at"] <= now:
+            if row is not None:
+                conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                    (self.namespace, key, now),
+                )
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+
+        value = json.loads(row["value"])
+        with self._lock:
+            self._counters["disk_hits"] += 1
+            self._remember(key, row["expires_at"], copy.deepcopy(value))
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        _shared_conn(self._path).execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value, default=str), expires_at),
+        )
+        with self._lock:
+            self._remember(key, expires_at, copy.deepcopy(value))
+            self._writes += 1
+            sweep = self._writes % _SWEEP_EVERY == 0
+        if sweep:
+            self.purge_expired()
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one key, or the whole namespace when no key is given."""
+        conn = _shared_conn(self._path)
+        with self._lock:
+            if key is None:
+                self._memory.clear()
+                conn.execute("DELETE FROM entries WHERE namespace = ?", (self.namespace,))
+            else:
+                self._memory.pop(key, None)
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def purge_expired(self) -> None:
+        """Delete this namespace's expired rows, then its soonest-expiring rows beyond ``max_disk_entries``."""
+        conn = _shared_conn(self._path)
+        conn.execute("DELETE FROM entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, time.time()))
+        conn.execute(
+            """
+            DELETE FROM entries WHERE namespace = ? AND key IN (
+                SELECT key FROM entries WHERE namespace = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.namespace, self.namespace, self.max_disk_entries),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "memory_entries": len(self._memory)}
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
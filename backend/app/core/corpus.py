@@ -0,0 +1,287 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Iterable, Optional
+
+from app.core.db import DATA_DIR, connect
+from app.core.dedup import canonical_url
+from app.sources.base import ContentItem
+
+CORPUS_PATH = os.path.join(DATA_DIR, "corpus.sqlite3")
+CORPUS_ENABLED = os.getenv("CORPUS_ENABLED", "1").lower() in {"1", "true", "yes"}
+# Keyword searches are answered from items seen within this many seconds instead of scraped again.
+CORPUS_FRESH_SECONDS = float(os.getenv("CORPUS_FRESH_SECONDS", str(6 * 60 * 60)))
+# Fresh matching items a source needs in the corpus before its keyword search is skipped.
+CORPUS_MIN_ITEMS = int(os.getenv("CORPUS_MIN_ITEMS", "15"))
+# Fresh items each of the search's keywords must match on its own, so one popular keyword can't stand in for the rest.
+CORPUS_MIN_PER_KEYWORD = int(os.getenv("CORPUS_MIN_PER_KEYWORD", "3"))
+# Most items one corpus search returns, best full-text matches first.
+CORPUS_SEARCH_LIMIT = int(os.getenv("CORPUS_SEARCH_LIMIT", "60"))
+# Items not seen again for this long are pruned along with their snapshots.
+CORPUS_RETENTION_DAYS = float(os.getenv("CORPUS_RETENTION_DAYS", "30"))
+
+WINDOW_SECONDS = {"24h": 86400, "7d": 7 * 86400, "14d": 14 * 86400, "30d": 30 * 86400}
+_UNIT_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400}
+_RELATIVE_AGE = re.compile(r"(\d+)\s+(second|minute|hour|day|week|month|year)")
+_PRUNE_INTERVAL = 60 * 60
+
+
+def corpus_key(item: ContentItem) -> str:
+    """The stable id an item is stored under: its video or post id, else its canonical URL."""
+    if item.source == "youtube" and item.raw_metadata.get("video_id"):
+        return f"youtube:{item.raw_metadata['video_id']}"
+    if item.source == "reddit" and item.raw_metadata.get("post_id"):
+        return f"reddit:{item.raw_metadata['post_id']}"
+    return f"url:{canonical_url(item.url)}"
+
+
+class ContentCorpus:
+    """Every scraped item, kept across requests in SQLite with an FTS5 index over title and text.
+
+    Items are upserted by ``corpus_key``: the latest fields replace the old
+    ones, ``first_seen`` is kept, ``last_seen`` moves forward, and the
+    engagement is appended to ``engagement_snapshots`` whenever it changed.
+    ``search`` serves recently seen items matching any keyword, and
+    ``keyword_counts`` shows how well each keyword is covered, so a recurring
+    niche can skip scraping sources that are already well covered.
+    """
+
+    def __init__(self, path: str = CORPUS_PATH, retention_days: float = CORPUS_RETENTION_DAYS):
+        self.retention = retention_days * 86400
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self._counters = {"upserts": 0, "searches": 0, "served": 0}
+        self._pruned_at = 0.0
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                author TEXT NOT NULL,
+                published_at TEXT,
+                published_ts REAL,
+                extracted_text TEXT NOT NULL,
+                engagement TEXT NOT NULL,
+                raw_metadata TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_items_source_seen ON items(source, last_seen)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS engagement_snapshots (
+                key TEXT NOT NULL,
+                seen_at REAL NOT NULL,
+                engagement TEXT NOT NULL,
+                PRIMARY KEY (key, seen_at)
+            )
+        """)
+        # External-content index: the triggers keep it in step with the items table.
+        self._conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS items_fts
+            USING fts5(title, extracted_text, content='items', content_rowid='rowid')
+        """)
+        self._conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+                INSERT INTO items_fts(rowid, title, extracted_text) VALUES (new.rowid, new.title, new.extracted_text);
+            END
+        """)
+        self._conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, title, extracted_text)
+                VALUES ('delete', old.rowid, old.title, old.extracted_text);
+            END
+        """)
+        self._conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE OF title, extracted_text ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, title, extracted_text)
+                VALUES ('delete', old.rowid, old.title, old.extracted_text);
+                INSERT INTO items_fts(rowid, title, extracted_text) VALUES (new.rowid, new.title, new.extracted_text);
+            END
+        """)
+
+    def upsert(self, items: Iterable[ContentItem]) -> int:
+        """Store freshly scraped items, returning how many were written."""
+        now = time.time()
+        rows = []
+        for item in items:
+            engagement = json.dumps(item.engagement, sort_keys=True, default=str)
+            rows.append((
+                corpus_key(item), item.source, item.url, item.title, item.author, item.published_at,
+                _published_ts(item.published_at, now), item.extracted_text, engagement,
+                json.dumps(item.raw_metadata, default=str), now, now,
+            ))
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for row in rows:
+                    previous = self._conn.execute("SELECT engagement FROM items WHERE key = ?", (row[0],)).fetchone()
+                    self._conn.execute(
+                        """
+                        INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(key) DO UPDATE SET
+                            url = excluded.url, title = excluded.title, author = excluded.author,
+                            published_at = excluded.published_at,
+                            published_ts = COALESCE(excluded.published_ts, items.published_ts),
+                            extracted_text = excluded.extracted_text, engagement = excluded.engagement,
+                            raw_metadata = excluded.raw_metadata, last_seen = excluded.last_seen
+                        """,
+                        row,
+                    )
+                    if previous is None or previous["engagement"] != row[8]:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO engagement_snapshots VALUES (?, ?, ?)", (row[0], now, row[8]),
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._counters["upserts"] += len(rows)
+            if now - self._pruned_at > _PRUNE_INTERVAL:
+                self._prune(now)
+        return len(rows)
+
+    def search(
+        self,
+        source: str,
+        keywords: list[str],
+        time_window: str = "7d",
+        max_age: float = CORPUS_FRESH_SECONDS,
+        limit: int = CORPUS_SEARCH_LIMIT,
+    ) -> list[ContentItem]:
+        """Items from ``source`` seen within ``max_age`` seconds that match any keyword, best matches first.
+
+        Items known to be published before ``time_window`` are left out.
+        """
+        query = " OR ".join(_phrase(kw) for kw in keywords if kw.strip())
+        if not query:
+            return []
+        seen_after, published_after = _fresh_bounds(time_window, max_age)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT items.* {_FRESH_MATCHES} ORDER BY items_fts.rank LIMIT ?",
+                (query, source, seen_after, published_after, published_after, limit),
+            ).fetchall()
+            self._counters["searches"] += 1
+            self._counters["served"] += len(rows)
+        return [_to_item(row) for row in rows]
+
+    def keyword_counts(
+        self,
+        source: str,
+        keywords: list[str],
+        time_window: str = "7d",
+        max_age: float = CORPUS_FRESH_SECONDS,
+    ) -> dict[str, int]:
+        """How many of the items ``search`` could serve match each keyword on its own."""
+        seen_after, published_after = _fresh_bounds(time_window, max_age)
+        counts = {}
+        with self._lock:
+            for kw in dict.fromkeys(kw for kw in keywords if kw.strip()):
+                counts[kw] = self._conn.execute(
+                    f"SELECT COUNT(*) {_FRESH_MATCHES}",
+                    (_phrase(kw), source, seen_after, published_after, published_after),
+                ).fetchone()[0]
+        return counts
+
+    def snapshots(self, item: ContentItem) -> list[dict]:
+        """The item's engagement history, oldest first, as {"seen_at", "engagement"} dicts."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seen_at, engagement FROM engagement_snapshots WHERE key = ? ORDER BY seen_at",
+                (corpus_key(item),),
+            ).fetchall()
+        return [{"seen_at": row["seen_at"], "engagement": json.loads(row["engagement"])} for row in rows]
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.retention
+        self._conn.execute(
+            "DELETE FROM engagement_snapshots WHERE key IN (SELECT key FROM items WHERE last_seen < ?)", (cutoff,),
+        )
+        self._conn.execute("DELETE FROM items WHERE last_seen < ?", (cutoff,))
+        self._pruned_at = now
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            snapshots = self._conn.execute("SELECT COUNT(*) FROM engagement_snapshots").fetchone()[0]
+            return {**self._counters, "items": items, "snapshots": snapshots}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM items")
+            self._conn.execute("DELETE FROM engagement_snapshots")
+
+
+_FRESH_MATCHES = """
+    FROM items_fts JOIN items ON items.rowid = items_fts.rowid
+    WHERE items_fts MATCH ? AND items.source = ? AND items.last_seen >= ?
+      AND (? IS NULL OR items.published_ts IS NULL OR items.published_ts >= ?)
+"""
+
+
+def _phrase(keyword: str) -> str:
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def _fresh_bounds(time_window: str, max_age: float) -> tuple[float, Optional[float]]:
+    """(earliest last_seen, earliest known publication time or None) of items a search may serve."""
+    now = time.time()
+    window = WINDOW_SECONDS.get(time_window)
+    return now - max_age, (now - window if window else None)
+
+
+def _published_ts(published_at: Optional[str], seen_at: float) -> Optional[float]:
+    """Publication time as a Unix timestamp; relative texts ("3 days ago") count back from ``seen_at``."""
+    if not published_at:
+        return None
+    try:
+        return datetime.fromisoformat(published_at.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        pass
+    match = _RELATIVE_AGE.search(published_at.lower())
+    if match:
+        return seen_at - int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+    return None
+
+
+def _to_item(row: sqlite3.Row) -> ContentItem:
+    return ContentItem(
+        id=str(uuid.uuid4()),
+        source=row["source"],
+        url=row["url"],
+        title=row["title"],
+        author=row["author"],
+        published_at=row["published_at"],
+        extracted_text=row["extracted_text"],
+        engagement=json.loads(row["engagement"]),
+        raw_metadata=json.loads(row["raw_metadata"]),
+    )
+
+
+_corpus: Optional[ContentCorpus] = None
+_corpus_failed = False
+_corpus_lock = threading.Lock()
+
+
+def get_corpus() -> Optional[ContentCorpus]:
+    """Return the process-wide corpus, or None when CORPUS_ENABLED is off or SQLite lacks FTS5."""
+    global _corpus, _corpus_failed
+    if not CORPUS_ENABLED:
+        return None
+    with _corpus_lock:
+        if _corpus is None and not _corpus_failed:
+            try:
+                _corpus = ContentCorpus()
+            except sqlite3.Error:
+                _corpus_failed = True
+        return _corpus
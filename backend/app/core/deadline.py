@@ -0,0 +1,79 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from app.core.errors import DeadlineExceededError
+
+# Default time budget in seconds for a pipeline run; 0 means unbounded.
+PIPELINE_DEADLINE = float(os.getenv("PIPELINE_DEADLINE_SECONDS", "0"))
+# Seconds held back from scraping for ranking and the final LLM call.
+GENERATION_RESERVE = float(os.getenv("DEADLINE_GENERATION_RESERVE", "10"))
+
+_current: ContextVar[Optional["Deadline"]] = ContextVar("deadline", default=None)
+
+
+class Deadline:
+    """A point in time by which a request must finish; ``seconds=None`` never expires.
+
+    Activate it in a thread (``with deadline.active():``) and the HTTP client
+    and LLM gateway cap their timeouts to what is left.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    @classmethod
+    def from_request(cls, seconds: Optional[float]) -> "Deadline":
+        return cls(seconds if seconds is not None else (PIPELINE_DEADLINE or None))
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None when unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def cap(self, timeout: Optional[float]) -> Optional[float]:
+        """Shorten ``timeout`` to the time left; None means no limit on either side."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def scrape_budget(self, reserve: float = GENERATION_RESERVE) -> Optional[float]:
+        """Time scraping may take while leaving ``reserve`` for generation, but at least half of what's left."""
+        remaining = self.remaining()
+        if remaining is None:
+            return None
+        return max(remaining - reserve, remaining / 2)
+
+    def expire(self) -> None:
+        """End the deadline now; work running under it stops at its next check."""
+        self.expires_at = time.monotonic()
+
+    def check(self, phase: str) -> None:
+        if self.expired():
+            raise DeadlineExceededError(f"{self.seconds:g}s budget spent before {phase}")
+
+    @contextmanager
+    def active(self) -> Iterator["Deadline"]:
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline activated in this thread, if any."""
+    deadline = _current.get()
+    return deadline if deadline is not None and deadline.bounded else None
@@ -0,0 +1,208 @@
+import os
+import re
+from collections import defaultdict
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import numpy as np
+
+from app.sources.base import ContentItem
+from app.core.bm25 import tokenize
+from app.core.ranking import engagement_score
+
+# Largest Hamming distance between 64-bit SimHash signatures still treated as the same story.
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "3"))
+# Characters of extracted text (after the title) that go into an item's signature.
+SIMHASH_TEXT_CHARS = int(os.getenv("SIMHASH_TEXT_CHARS", "300"))
+# Items with fewer tokens than this are only matched by URL and id.
+SIMHASH_MIN_TOKENS = int(os.getenv("SIMHASH_MIN_TOKENS", "5"))
+
+# Hosts that serve the same pages under another name.
+HOST_ALIASES = {
+    "youtu.be": "youtube.com",
+    "m.youtube.com": "youtube.com",
+    "old.reddit.com": "reddit.com",
+    "new.reddit.com": "reddit.com",
+    "np.reddit.com": "reddit.com",
+    "m.reddit.com": "reddit.com",
+}
+# Query parameters that only track where a link was shared.
+TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "ref", "ref_src", "si", "feature", "share_id", "mc_cid", "mc_eid"}
+
+_YOUTUBE_ID = re.compile(r"^/(?:shorts|embed|live)/([\w-]{11})")
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so links to the same page compare equal.
+
+    Drops the scheme, "www.", fragments, tracking parameters and trailing
+    slashes, sorts the query, and maps short or alternate hosts (youtu.be,
+    old.reddit.com, /shorts/ links) to their main form.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().rsplit("@", 1)[-1]
+    host = host.removesuffix(":80").removesuffix(":443").removeprefix("www.")
+    host = HOST_ALIASES.get(host, host)
+    path = parts.path.rstrip("/")
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    ]
+
+    if host == "youtube.com":
+        video_id = None
+        if parts.netloc.lower().endswith("youtu.be"):
+            video_id = path.lstrip("/")
+        elif match := _YOUTUBE_ID.match(path):
+            video_id = match.group(1)
+        if video_id:
+            path, query = "/watch", [("v", video_id)]
+        elif path == "/watch":
+            query = [(key, value) for key, value in query if key == "v"]
+
+    return f"{host}{path}?{urlencode(sorted(query))}" if query else f"{host}{path}"
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash over the text's words and word pairs; None for texts too short to compare.
+
+    Built on Python's string hash, so signatures only compare within one process.
+    """
+    tokens = tokenize(text)
+    if len(tokens) < SIMHASH_MIN_TOKENS:
+        return None
+    words = np.array([hash(token) for token in tokens], dtype=np.int64).view(np.uint64)
+    pairs = _mix(words[:-1] * _GOLDEN ^ words[1:])
+    features = np.concatenate([_mix(words), pairs])
+    # One row of 64 bits per feature, least significant bit first.
+    bits = np.unpackbits(features.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    return int(np.packbits(votes > 0, bitorder="little").view("<u8")[0])
+
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: spreads every input bit over the whole word.
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+class Deduplicator:
+    """Collapses duplicate items across a run's sources as their batches arrive.
+
+    Exact duplicates share a canonical URL, YouTube video id or Reddit post
+    id. Near-duplicates have SimHash signatures of title and leading text
+    within ``max_distance`` bits. Signatures are split into
+    ``max_distance + 1`` bands, so any such pair has at least one identical
+    band, and only items sharing a band bucket are compared.
+
+    Each story is represented by one surviving item, whichever arrives
+    first, so later copies can be merged into it. Its fields are those of
+    the copy with the best engagement score, ties going to the lower batch
+    ``order`` and then to the earlier item in the batch, so the outcome does
+    not depend on which source finished first. The other copies' source,
+    URL and engagement are listed in ``raw_metadata["duplicates"]``, where
+    ranking finds their engagement. Survivors stay referenced for as long
+    as the deduplicator lives, so use one per run.
+    """
+
+    def __init__(self, max_distance: int = SIMHASH_MAX_DISTANCE):
+        self.max_distance = max(0, min(max_distance, 63))
+        self.bands = self.max_distance + 1
+        self.seen = 0
+        self.merged = 0
+        self._keys: dict[tuple[str, str], ContentItem] = {}
+        self._buckets: dict[tuple[int, int], list[tuple[int, ContentItem]]] = defaultdict(list)
+        # Survivor id -> preference key of the copy it currently shows; lower wins.
+        self._shown: dict[str, tuple[float, int, int]] = {}
+
+    def add(self, items: Iterable[ContentItem], order: int = 0) -> tuple[list[ContentItem], list[ContentItem]]:
+        """Filter a batch, returning (new survivors, earlier survivors that changed).
+
+        ``order`` is the batch's place in the plan, used to choose between equally engaging copies.
+        """
+        fresh: list[ContentItem] = []
+        fresh_ids: set[int] = set()
+        updated: dict[int, ContentItem] = {}
+        for position, item in enumerate(items):
+            self.seen += 1
+            preference = (-engagement_score(item.source, item.engagement), order, position)
+            keys = self._identity_keys(item)
+            signature = simhash(f"{item.title} {item.extracted_text[:SIMHASH_TEXT_CHARS]}")
+            survivor = next((self._keys[key] for key in keys if key in self._keys), None)
+            if survivor is None and signature is not None:
+                survivor = self._near_duplicate(signature)
+
+            if survivor is None:
+                fresh.append(item)
+                fresh_ids.add(id(item))
+                self._shown[item.id] = preference
+                survivor = item
+            else:
+                if preference < self._shown[survivor.id]:
+                    self._shown[survivor.id] = preference
+                    _adopt(survivor, item)
+                else:
+                    _merge(survivor, item)
+                self.merged += 1
+                if id(survivor) not in fresh_ids:
+                    updated[id(survivor)] = survivor
+            # Every copy's URL, ids and signature point at the survivor, so later copies of any of them match.
+            if signature is not None:
+                for band in self._band_values(signature):
+                    self._buckets[band].append((signature, survivor))
+            for key in keys:
+                self._keys.setdefault(key, survivor)
+        return fresh, list(updated.values())
+
+    def _near_duplicate(self, signature: int) -> Optional[ContentItem]:
+        for band in self._band_values(signature):
+            for other, item in self._buckets.get(band, ()):
+                if (signature ^ other).bit_count() <= self.max_distance:
+                    return item
+        return None
+
+    def _band_values(self, signature: int) -> list[tuple[int, int]]:
+        width = 64 // self.bands
+        bands = []
+        for band in range(self.bands):
+            # The last band takes any bits left over from the integer division.
+            bits = 64 - width * band if band == self.bands - 1 else width
+            bands.append((band, (signature >> (width * band)) & ((1 << bits) - 1)))
+        return bands
+
+    @staticmethod
+    def _identity_keys(item: ContentItem) -> list[tuple[str, str]]:
+        keys = []
+        if item.url:
+            keys.append(("url", canonical_url(item.url)))
+        meta = item.raw_metadata
+        if item.source == "youtube" and meta.get("video_id"):
+            keys.append(("youtube", meta["video_id"]))
+        if item.source == "reddit":
+            if meta.get("post_id"):
+                keys.append(("reddit", meta["post_id"]))
+            if meta.get("permalink"):
+                keys.append(("url", canonical_url(meta["permalink"])))
+        return keys
+
+
+def _merge(survivor: ContentItem, duplicate: ContentItem) -> None:
+    survivor.raw_metadata.setdefault("duplicates", []).append(_copy_entry(duplicate))
+
+
+def _adopt(survivor: ContentItem, better: ContentItem) -> None:
+    """Show ``better``'s fields on the survivor, keeping its id and listing the copy it showed before."""
+    duplicates = survivor.raw_metadata.pop("duplicates", [])
+    duplicates.append(_copy_entry(survivor))
+    for field in ("source", "url", "title", "author", "published_at", "extracted_text"):
+        setattr(survivor, field, getattr(better, field))
+    survivor.engagement = dict(better.engagement)
+    survivor.raw_metadata = {**better.raw_metadata, "duplicates": duplicates}
+
+
+def _copy_entry(item: ContentItem) -> dict:
+    return {"source": item.source, "url": item.url, "engagement": dict(item.engagement)}
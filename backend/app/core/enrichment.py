@@ -0,0 +1,55 @@
+import os
+from collections import defaultdict
+from functools import partial
+from urllib.parse import urlparse
+
+from app.sources.base import ContentItem, ContentSource
+from app.core.executor import get_executor
+
+# Items per source to enrich after ranking; 0 disables enrichment.
+ENRICH_TOP_K = int(os.getenv("ENRICH_TOP_K", "5"))
+# Seconds to wait for enrichment fetches before moving on without them.
+ENRICH_DEADLINE = float(os.getenv("ENRICH_DEADLINE", "8"))
+
+
+def enrich_items(
+    items: list[ContentItem],
+    keywords: list[str],
+    source_map: dict[str, ContentSource],
+    top_k: int = ENRICH_TOP_K,
+    deadline: float = ENRICH_DEADLINE,
+) -> int:
+    """Fold extra source text into the top ``top_k`` ranked items of each source.
+
+    ``items`` must already be ranked, so the extra fetches only go to items that
+    will reach the prompt. Returns the number of items enriched.
+    """
+    if top_k <= 0:
+        return 0
+
+    targets: list[tuple[ContentItem, ContentSource]] = []
+    taken: dict[str, int] = defaultdict(int)
+    for item in items:
+        source = source_map.get(item.source)
+        if source is None or not source.supports_enrichment or taken[item.source] >= top_k:
+            continue
+        taken[item.source] += 1
+        targets.append((item, source))
+
+    if not targets:
+        return 0
+
+    calls = [(_item_host(item), partial(source.fetch_enrichment, item, keywords)) for item, source in targets]
+    results = get_executor().run_calls(calls, timeout=deadline)
+
+    enriched = 0
+    for (item, _), extra in zip(targets, results):
+        if extra:
+            item.extracted_text = f"{item.extracted_text}\n\n{extra}"
+            item.raw_metadata["enriched"] = True
+            enriched += 1
+    return enriched
+
+
+def _item_host(item: ContentItem) -> str:
+    return urlparse(item.raw_metadata.get("permalink") or item.url).netloc.lower() or item.source
@@ -23,3 +23,15 @@ class StorageError(ResearchError):
     """Raised when local storage operation fails."""
     def __init__(self, message: str):
         super().__init__(f"Storage error: {message}", 500)
+
+
+class ServiceBusyError(ResearchError):
+    """Raised when the pipeline worker pool is saturated."""
+    def __init__(self, message: str):
+        super().__init__(f"Service busy: {message}", 503)
+
+
+class DeadlineExceededError(ResearchError):
+    """Raised when a request's time budget runs out before a result can be produced."""
+    def __init__(self, message: str):
+        super().__init__(f"Deadline exceeded: {message}", 504)
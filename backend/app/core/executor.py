@@ -0,0 +1,205 @@
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Iterator, Optional
+from urllib.parse import urlparse
+
+from app.core.deadline import Deadline
+from app.sources.base import ContentItem, ContentSource
+from app.sources.ratelimit import get_host_guard
+
+MAX_CONCURRENCY = int(os.getenv("SCRAPE_MAX_CONCURRENCY", "8"))
+PER_HOST_CONCURRENCY = int(os.getenv("SCRAPE_PER_HOST_CONCURRENCY", "2"))
+
+# Keyword searches carry no URL, so they are attributed to the host the source queries.
+_SOURCE_HOSTS = {
+    "youtube": "www.youtube.com",
+    "reddit": "old.reddit.com",
+}
+
+
+@dataclass
+class ScrapeOutcome:
+    """The result of one scrape plan task; ``index`` is its position in the plan."""
+    index: int
+    task: dict
+    items: list[ContentItem] = field(default_factory=list)
+    error: Optional[str] = None
+    cut_off: bool = False
+    from_corpus: bool = False  # answered from the stored corpus instead of scraped
+
+
+class ScrapeExecutor:
+    """Run scrape plan tasks concurrently under a global and a per-host limit.
+
+    Tasks wait for their host's limit before they are handed to the pool, so a
+    task queued behind a busy host never holds one of the global slots.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, per_host_concurrency: int = PER_HOST_CONCURRENCY):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="scrape")
+        # Tasks running or queued in the pool, per host; a task is only submitted while its host is under the limit.
+        self._host_active: dict[str, int] = {}
+        # One future per waiting run, resolved whenever a host slot frees up.
+        self._waiters: list[Future] = []
+        self._lock = threading.Lock()
+
+    def stream(
+        self,
+        scrape_plan: list[dict],
+        source_map: dict[str, ContentSource],
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[ScrapeOutcome]:
+        """Yield each task's outcome as soon as it finishes.
+
+        Tasks whose host has an open circuit breaker are skipped with an error.
+        Tasks not finished when ``deadline`` passes, whether running or still
+        waiting for their host, are cancelled and yielded last, marked
+        ``cut_off``. Closing the generator early does the same without yielding
+        them; either way in-flight requests stop at their next fetch.
+        """
+        # A private deadline, so stopping this run's tasks can't affect the caller's.
+        run_deadline = Deadline(deadline.remaining() if deadline is not None else None)
+        guard = get_host_guard()
+        planned: list[tuple[int, dict]] = []
+        jobs: list[tuple[str, Callable[[], Any]]] = []
+        completions = None
+        try:
+            for index, task in enumerate(scrape_plan):
+                if guard.is_open(task_host(task)):
+                    yield ScrapeOutcome(
+                        index, task, error=f"{task['source']}: skipped, {task_host(task)} is failing (circuit open)",
+                    )
+                    continue
+                source = source_map.get(task["source"]) or source_map["generic"]
+                planned.append((index, task))
+                jobs.append((task_host(task), partial(self._run_task, task, source, run_deadline)))
+
+            finished: set[int] = set()
+            completions = self._completed(jobs, run_deadline)
+            for job, future in completions:
+                finished.add(job)
+                index, task = planned[job]
+                try:
+                    outcome = ScrapeOutcome(index, task, items=future.result())
+                except Exception as e:
+                    outcome = ScrapeOutcome(index, task, error=f"{task['source']}: {str(e)}")
+                yield outcome
+
+            completions.close()
+            for job, (index, task) in enumerate(planned):
+                if job not in finished:
+                    yield ScrapeOutcome(index, task, error=f"{task['source']}: cut off at the deadline", cut_off=True)
+        finally:
+            if completions is not None:
+                completions.close()
+            run_deadline.expire()
+
+    def run_calls(self, calls: list[tuple[str, Callable[[], Any]]], timeout: Optional[float] = None) -> list[Any]:
+        """Run (host, fn) calls under the same limits, returning results in order.
+
+        Calls that fail, are not finished when ``timeout`` expires, or target a
+        host with an open circuit breaker yield None.
+        """
+        guard = get_host_guard()
+        deadline = Deadline(timeout)
+        results: list[Any] = [None] * len(calls)
+        admitted = [(i, host, fn) for i, (host, fn) in enumerate(calls) if not guard.is_open(host)]
+        completions = self._completed(
+            [(host, partial(self._run_call, fn, deadline)) for _, host, fn in admitted], deadline,
+        )
+        try:
+            for job, future in completions:
+                if future.exception() is None:
+                    results[admitted[job][0]] = future.result()
+        finally:
+            completions.close()
+        return results
+
+    def _completed(
+        self, jobs: list[tuple[str, Callable[[], Any]]], deadline: Deadline,
+    ) -> Iterator[tuple[int, Future]]:
+        """Submit (host, fn) jobs as their hosts free up, yielding (job index, future) as each finishes.
+
+        Stops at ``deadline``. Closing the generator cancels the jobs still
+        queued in the pool; jobs not yet submitted are simply dropped.
+        """
+        waiting = list(enumerate(jobs))
+        running: dict[Future, int] = {}
+        try:
+            while waiting or running:
+                wake: Future = Future()
+                admitted = []
+                with self._lock:
+                    # Registered before the check, so a slot freed right after it still wakes us.
+                    self._waiters.append(wake)
+                    blocked = []
+                    for job, (host, fn) in waiting:
+                        if self._host_active.get(host, 0) < self.per_host_concurrency:
+                            self._host_active[host] = self._host_active.get(host, 0) + 1
+                            admitted.append((job, host, fn))
+                        else:
+                            blocked.append((job, (host, fn)))
+                    waiting = blocked
+                # Outside the lock: a future that is already done runs its callback right here.
+                for job, host, fn in admitted:
+                    future = self._pool.submit(fn)
+                    future.add_done_callback(partial(self._release, host))
+                    running[future] = job
+
+                done, _ = wait([*running, wake], timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+                with self._lock:
+                    if wake in self._waiters:
+                        self._waiters.remove(wake)
+                if not done:
+                    return
+                for future in done:
+                    if future is not wake:
+                        yield running.pop(future), future
+        finally:
+            for future in running:
+                future.cancel()
+
+    def _release(self, host: str, _future: Future) -> None:
+        with self._lock:
+            self._host_active[host] -= 1
+            if not self._host_active[host]:
+                del self._host_active[host]
+            waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            waiter.set_result(None)
+
+    def _run_call(self, fn: Callable[[], Any], deadline: Deadline) -> Any:
+        with deadline.active():
+            return fn()
+
+    def _run_task(self, task: dict, source: ContentSource, deadline: Deadline) -> list[ContentItem]:
+        with deadline.active():
+            return source.scrape(
+                url=task["url"],
+                keywords=task["keywords"],
+                time_window=task["time_window"],
+            )
+
+
+def task_host(task: dict) -> str:
+    if task.get("url"):
+        return urlparse(task["url"]).netloc.lower() or task["url"]
+    return _SOURCE_HOSTS.get(task["source"], task["source"])
+
+
+_executor: Optional[ScrapeExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ScrapeExecutor:
+    """Return the process-wide executor so the global limit spans all requests."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ScrapeExecutor()
+        return _executor
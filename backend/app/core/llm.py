@@ -0,0 +1,230 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, Optional
+
+import groq
+from groq import Groq
+
+from app.core.deadline import Deadline, current_deadline
+from app.core.errors import DeadlineExceededError, LLMError
+
+MODEL = "llama-3.3-70b-versatile"
+
+# Per-call-type request timeouts in seconds.
+CALL_TIMEOUTS = {
+    "perceive": float(os.getenv("LLM_TIMEOUT_PERCEIVE", "15")),
+    "topics": float(os.getenv("LLM_TIMEOUT_TOPICS", "30")),
+    "script": float(os.getenv("LLM_TIMEOUT_SCRIPT", "120")),
+}
+DEFAULT_TIMEOUT = 60.0
+
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+# Seconds to wait on a short call before firing a duplicate request; 0 disables hedging.
+HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "0"))
+HEDGED_CALL_TYPES = {"perceive"}
+
+_RETRYABLE = (groq.RateLimitError, groq.InternalServerError, groq.APITimeoutError, groq.APIConnectionError)
+
+_client: Optional[Groq] = None
+_client_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-hedge")
+
+_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def get_client() -> Groq:
+    """Return the process-wide Groq client; its HTTP connection pool is reused by every call."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            api_key = os.getenv("GROQ_API_KEY")
+            if not api_key or api_key == "your_groq_api_key_here":
+                raise LLMError("GROQ_API_KEY environment variable is not set. Add your key to backend/.env")
+            # Retries are handled here, with jitter and per-call-type accounting.
+            _client = Groq(api_key=api_key, max_retries=0)
+        return _client
+
+
+def chat_completion(
+    call_type: str,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int,
+    timeout: Optional[float] = None,
+) -> str:
+    """Run a chat completion with retries (and hedging for short call types) and return its text.
+
+    Under an active deadline each attempt's timeout is capped to the time left
+    and no retry is started once it has passed.
+    """
+    client = get_client()
+    timeout = timeout or CALL_TIMEOUTS.get(call_type, DEFAULT_TIMEOUT)
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.check(f"the {call_type} call")
+
+    def attempt():
+        return client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=deadline.cap(timeout) if deadline is not None else timeout,
+        )
+
+    started = time.monotonic()
+    try:
+        if call_type in HEDGED_CALL_TYPES and HEDGE_DELAY > 0:
+            response = _hedged(call_type, lambda: _with_retries(call_type, attempt, deadline))
+        else:
+            response = _with_retries(call_type, attempt, deadline)
+    except Exception:
+        _record(call_type, time.monotonic() - started, error=True)
+        raise
+
+    usage = getattr(response, "usage", None)
+    _record(
+        call_type,
+        time.monotonic() - started,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+    )
+    return response.choices[0].message.content
+
+
+def chat_stream(
+    call_type: str,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int,
+    timeout: Optional[float] = None,
+) -> Iterator[str]:
+    """Stream a chat completion as text deltas. Only opening the stream is retried."""
+    client = get_client()
+    timeout = timeout or CALL_TIMEOUTS.get(call_type, DEFAULT_TIMEOUT)
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.check(f"the {call_type} call")
+
+    started = time.monotonic()
+    try:
+        stream = _with_retries(call_type, lambda: client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=deadline.cap(timeout) if deadline is not None else timeout,
+            stream=True,
+        ), deadline)
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+    except Exception:
+        _record(call_type, time.monotonic() - started, error=True)
+        raise
+    _record(call_type, time.monotonic() - started)
+
+
+def _with_retries(call_type: str, fn: Callable, deadline: Optional[Deadline] = None):
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not _is_retryable(e):
+                raise
+            delay = _backoff(attempt, e)
+            if deadline is not None and deadline.remaining() <= delay:
+                raise DeadlineExceededError(f"no time left to retry the {call_type} call") from e
+            _record_retry(call_type)
+            time.sleep(delay)
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, _RETRYABLE):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff, never shorter than a server-sent Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(delay, min(float(retry_after), BACKOFF_MAX)) if retry_after else delay
+    except ValueError:
+        return delay
+
+
+def _hedged(call_type: str, fn: Callable):
+    """Run ``fn``; if it hasn't finished after HEDGE_DELAY, race a second copy and take the first success."""
+    futures = [_hedge_pool.submit(fn)]
+    done, _ = wait(futures, timeout=HEDGE_DELAY)
+    if not done:
+        _record_hedge(call_type)
+        futures.append(_hedge_pool.submit(fn))
+
+    pending = set(futures)
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def _bucket(call_type: str) -> dict:
+    return _stats.setdefault(call_type, {
+        "calls": 0,
+        "errors": 0,
+        "retries": 0,
+        "hedges": 0,
+        "latency_ms_total": 0.0,
+        "latency_ms_max": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+    })
+
+
+def _record(call_type: str, elapsed: float, error: bool = False, prompt_tokens: int = 0, completion_tokens: int = 0):
+    latency_ms = elapsed * 1000
+    with _stats_lock:
+        bucket = _bucket(call_type)
+        bucket["calls"] += 1
+        bucket["errors"] += int(error)
+        bucket["latency_ms_total"] += latency_ms
+        bucket["latency_ms_max"] = max(bucket["latency_ms_max"], latency_ms)
+        bucket["prompt_tokens"] += prompt_tokens
+        bucket["completion_tokens"] += completion_tokens
+
+
+def _record_retry(call_type: str):
+    with _stats_lock:
+        _bucket(call_type)["retries"] += 1
+
+
+def _record_hedge(call_type: str):
+    with _stats_lock:
+        _bucket(call_type)["hedges"] += 1
+
+
+def get_stats() -> dict:
+    """Return per-call-type latency, token usage and retry counters."""
+    with _stats_lock:
+        return {
+            call_type: {
+                **bucket,
+                "latency_ms_avg": round(bucket["latency_ms_total"] / bucket["calls"], 1) if bucket["calls"] else 0.0,
+            }
+            for call_type, bucket in _stats.items()
+        }
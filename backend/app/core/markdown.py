@@ -1,15 +1,6 @@
-import os
-from groq import Groq
-from app.core.errors import LLMError
-
-MODEL = "llama-3.3-70b-versatile"
-
-
-def _get_client() -> Groq:
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key or api_key == "your_groq_api_key_here":
-        raise LLMError("GROQ_API_KEY environment variable is not set. Add your key to backend/.env")
-    return Groq(api_key=api_key)
+from typing import Iterator
+from app.core.errors import LLMError, ResearchError
+from app.core.llm import chat_completion, chat_stream
 
 
 # ──────────────────────────────────────────────
@@ -22,8 +13,6 @@ def generate_topics(
     research_context: str,
 ) -> str:
     """Generate a numbered list of compelling YouTube video topic titles."""
-    client = _get_client()
-
     topic_source = prompt.strip() if prompt.strip() else f"trending topics in the {category} niche"
     tone = _get_tone_guidance(category, prompt)
 
@@ -53,16 +42,17 @@ Output format (strictly follow this):
 Output only the numbered list. Nothing else."""
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[
+        return chat_completion(
+            "topics",
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
             temperature=0.75,
             max_tokens=500,
-        )
-        return response.choices[0].message.content.strip()
+        ).strip()
+    except ResearchError:
+        raise
     except Exception as e:
         raise LLMError(f"Failed to generate topics: {str(e)}")
 
@@ -85,10 +75,69 @@ def generate_script(
     video_duration_legacy: str = "",
 ) -> str:
     """Generate a fully structured, ready-to-record YouTube video script."""
-    client = _get_client()
+    system_prompt, user_prompt = _build_script_prompts(
+        topic or prompt,
+        category,
+        video_duration or video_duration_legacy or "5 min",
+        broll_enabled,
+        onscreen_text_enabled,
+        research_context,
+    )
+
+    try:
+        return chat_completion(
+            "script",
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.72,
+            max_tokens=6000,
+        ).strip()
+    except ResearchError:
+        raise
+    except Exception as e:
+        raise LLMError(f"Failed to generate script: {str(e)}")
+
+
+def stream_script(
+    topic: str,
+    category: str = "",
+    video_duration: str = "5 min",
+    broll_enabled: bool = False,
+    onscreen_text_enabled: bool = False,
+    research_context: str = "",
+) -> Iterator[str]:
+    """Generate a script like generate_script, yielding text deltas as they arrive."""
+    system_prompt, user_prompt = _build_script_prompts(
+        topic, category, video_duration or "5 min", broll_enabled, onscreen_text_enabled, research_context,
+    )
+
+    try:
+        yield from chat_stream(
+            "script",
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.72,
+            max_tokens=6000,
+        )
+    except ResearchError:
+        raise
+    except Exception as e:
+        raise LLMError(f"Failed to generate script: {str(e)}")
+
 
-    effective_topic = topic or prompt
-    effective_duration = video_duration or video_duration_legacy or "5 min"
+def _build_script_prompts(
+    effective_topic: str,
+    category: str,
+    effective_duration: str,
+    broll_enabled: bool,
+    onscreen_text_enabled: bool,
+    research_context: str,
+) -> tuple[str, str]:
+    """Return the (system, user) prompt pair for a script request."""
     tone = _get_tone_guidance(category, effective_topic)
 
     broll_instruction = (
@@ -138,19 +187,7 @@ Research context (base your facts on this):
 
 Remember: Output only the labeled script. Nothing else."""
 
-    try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.72,
-            max_tokens=6000,
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        raise LLMError(f"Failed to generate script: {str(e)}")
+    return system_prompt, user_prompt
 
 
 def _get_tone_guidance(category: str, prompt: str) -> str:
@@ -0,0 +1,151 @@
+import re
+from collections import defaultdict
+
+# Compact English stopword list, plus filler words common in research prompts.
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further get had has have having he her
+here hers herself him himself his how i if in into is it its itself just me more most my myself no nor not
+now of off on once only or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours yourself yourselves
+content contents video videos channel channels youtube reddit find show give want looking look need ideas idea
+topic topics make create research something things thing please latest trending popular viral top best biggest new saying
+""".split())
+
+# Related searches per category, used to widen the keyword set.
+CATEGORY_EXPANSIONS = {
+    "technology": ["tech news", "ai tools", "gadgets review", "software", "startups"],
+    "gaming": ["game review", "gameplay", "esports", "new game releases", "gaming news"],
+    "finance": ["investing", "stock market", "personal finance", "economy", "crypto"],
+    "education": ["explained", "how to", "tutorial", "science", "history"],
+    "lifestyle": ["daily routine", "productivity", "health tips", "travel", "self improvement"],
+    "entertainment": ["movies", "tv shows", "celebrity news", "music", "pop culture"],
+}
+
+# Prompt words that imply a category when none was selected.
+CATEGORY_SIGNALS = {
+    "finance": {"finance", "stock", "stocks", "invest", "investing", "economy", "money", "budget", "crypto", "market"},
+    "gaming": {"gaming", "game", "games", "esports", "console", "nintendo", "playstation", "xbox"},
+    "entertainment": {"movie", "movies", "film", "celebrity", "music", "tv", "show", "netflix"},
+    "technology": {"tech", "technology", "ai", "software", "gadget", "gadgets", "phone", "coding", "programming"},
+    "education": {"learn", "tutorial", "science", "history", "explain", "explained", "education"},
+    "lifestyle": {"lifestyle", "health", "fitness", "travel", "productivity", "routine", "food"},
+}
+
+INTENT_RULES = [
+    ("influencer_ranking", re.compile(
+        r"\b(creators?|influencers?|channels?|youtubers?|streamers?|who (?:is|are)|rank(?:ing)?|biggest|top \d+)\b")),
+    ("trend_discovery", re.compile(
+        r"\b(trend(?:s|ing)?|viral|latest|new|this (?:week|month|year)|right now|today|emerging|hot)\b")),
+]
+
+MAX_PHRASE_WORDS = 3
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#'\-]*")
+_PHRASE_SPLIT = re.compile(r"[^\w\s+#'\-]+")
+
+
+def extract_keyphrases(text: str, limit: int = 8) -> list[str]:
+    """RAKE keyphrase extraction: split on stopwords/punctuation, score words by degree/frequency."""
+    phrases: list[list[str]] = []
+    for fragment in _PHRASE_SPLIT.split(text.lower()):
+        current: list[str] = []
+        for word in _WORD.findall(fragment):
+            if word in STOPWORDS or len(word) < 2:
+                if current:
+                    phrases.append(current)
+                current = []
+            else:
+                current.append(word)
+        if current:
+            phrases.append(current)
+
+    frequency: dict[str, int] = defaultdict(int)
+    degree: dict[str, int] = defaultdict(int)
+    for phrase in phrases:
+        for word in phrase:
+            frequency[word] += 1
+            degree[word] += len(phrase)
+
+    scored: dict[str, float] = {}
+    for phrase in phrases:
+        key = " ".join(phrase)
+        scored[key] = max(scored.get(key, 0.0), sum(degree[w] / frequency[w] for w in phrase))
+
+    ranked = sorted(scored, key=lambda p: (-scored[p], p))
+    # Short phrases are kept whole; longer runs make poor search terms, so use their words.
+    keywords: list[str] = []
+    for phrase in ranked:
+        words = phrase.split()
+        if len(words) == 1:
+            candidates = words
+        elif len(words) <= MAX_PHRASE_WORDS:
+            candidates = [phrase] + words
+        else:
+            candidates = words
+        for candidate in candidates:
+            if candidate not in keywords:
+                keywords.append(candidate)
+    return keywords[:limit]
+
+
+def infer_category(prompt: str, category: str = "") -> str:
+    if category and category.lower() in CATEGORY_EXPANSIONS:
+        return category.lower()
+    words = set(_WORD.findall(prompt.lower()))
+    best, best_hits = "", 0
+    for name, signals in CATEGORY_SIGNALS.items():
+        hits = len(words & signals)
+        if hits > best_hits:
+            best, best_hits = name, hits
+    return best
+
+
+def classify_intent(prompt: str) -> str:
+    text = prompt.lower()
+    for intent, pattern in INTENT_RULES:
+        if pattern.search(text):
+            return intent
+    return "content_ideation"
+
+
+def source_strategy(prompt: str, target_urls: list[str]) -> list[str]:
+    if target_urls:
+        sources = []
+        for url in target_urls:
+            if "youtube.com" in url or "youtu.be" in url:
+                source = "youtube"
+            elif "reddit.com" in url:
+                source = "reddit"
+            else:
+                source = "generic"
+            if source not in sources:
+                sources.append(source)
+        return sources
+
+    # Prompts (and category presets) often say "on YouTube" without meaning to exclude
+    # Reddit, so only an explicit Reddit-only prompt narrows the search.
+    text = prompt.lower()
+    if "reddit" in text and "youtube" not in text:
+        return ["reddit"]
+    return ["youtube", "reddit"]
+
+
+def local_perceive(prompt: str, target_urls: list[str], category: str = "") -> dict:
+    """Build a Perceive-phase plan without an LLM call; same shape as the LLM output."""
+    keywords = extract_keyphrases(prompt) or [w for w in _WORD.findall(prompt.lower())][:8]
+    inferred = infer_category(prompt, category)
+    expanded = [kw for kw in CATEGORY_EXPANSIONS.get(inferred, []) if kw not in keywords][:5]
+    sources = source_strategy(prompt, target_urls)
+
+    return {
+        "keywords": keywords,
+        "intent": classify_intent(prompt),
+        "expanded_keywords": expanded,
+        "source_strategy": sources,
+        "research_plan": (
+            f"Search {', '.join(sources)} for {', '.join(keywords[:3]) or 'the prompt'}"
+            + (f" within the {inferred} niche" if inferred else "")
+        ),
+    }
@@ -1,32 +1,111 @@
 import os
+import re
 import json
-from groq import Groq
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
 from app.sources.base import ContentItem
 from app.sources.youtube import YouTubeSource
 from app.sources.reddit import RedditSource
 from app.sources.generic import GenericSource
-from app.core.ranking import rank_items
+from app.core.ranking import TopKRanker
+from app.core.dedup import Deduplicator
+from app.core.executor import ScrapeOutcome, get_executor
+from app.core.corpus import CORPUS_MIN_ITEMS, CORPUS_MIN_PER_KEYWORD, ContentCorpus, get_corpus
+from app.core.enrichment import ENRICH_DEADLINE, enrich_items
 from app.core.markdown import generate_script
 from app.core.storage import save_record
 from app.core.errors import LLMError, ResearchError
+from app.core.llm import chat_completion
+from app.core.cache import TieredCache
+from app.core.deadline import GENERATION_RESERVE, Deadline
+from app.core.perceive_local import local_perceive
 
-MODEL = "llama-3.3-70b-versatile"
+PERCEIVE_CACHE_TTL = float(os.getenv("PERCEIVE_CACHE_TTL", str(6 * 60 * 60)))
+_perceive_cache = TieredCache("perceive", ttl=PERCEIVE_CACHE_TTL, max_entries=512)
 
+# Topic generation starts without waiting for slower sources once every context slot
+# holds an item scoring at least this much; 0 always waits for every source.
+TOPICS_GOOD_ENOUGH_SCORE = float(os.getenv("TOPICS_GOOD_ENOUGH_SCORE", "0.65"))
 
-def _get_llm_client() -> Groq:
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key or api_key == "your_groq_api_key_here":
-        raise LLMError("GROQ_API_KEY environment variable is not set.")
-    return Groq(api_key=api_key)
+# Characters of each ranked item's text included in the topics research context.
+CONTEXT_SNIPPET_CHARS = int(os.getenv("CONTEXT_SNIPPET_CHARS", "600"))
+
+# llm: always ask the LLM (cached); local: rule-based engine only;
+# local-then-llm-async: answer locally now, warm the LLM cache in the background.
+PERCEIVE_MODES = ("llm", "local", "local-then-llm-async")
+PERCEIVE_MODE = os.getenv("PERCEIVE_MODE", "llm")
+# Fraction of a run's remaining time budget the Perceive LLM call may use.
+PERCEIVE_DEADLINE_SHARE = float(os.getenv("PERCEIVE_DEADLINE_SHARE", "0.25"))
+
+_perceive_background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="perceive")
+_perceive_inflight: set[str] = set()
+_perceive_inflight_lock = threading.Lock()
 
 
 # ──────────────────────────────────────────────
 # P — Perceive
 # ──────────────────────────────────────────────
-def perceive(prompt: str, target_urls: list[str]) -> dict:
-    """Parse prompt, extract keywords, classify intent, expand semantics."""
-    client = _get_llm_client()
+def perceive(
+    prompt: str,
+    target_urls: list[str],
+    category: str = "",
+    mode: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+) -> dict:
+    """Parse prompt, extract keywords, classify intent, expand semantics.
 
+    Under a ``deadline`` the LLM call gets at most PERCEIVE_DEADLINE_SHARE of
+    the time left, and a failed or timed-out call falls back to the local engine.
+    """
+    mode = mode or PERCEIVE_MODE
+    if mode not in PERCEIVE_MODES:
+        raise ResearchError(f"Unknown perceive mode '{mode}', expected one of {', '.join(PERCEIVE_MODES)}", 400)
+
+    if mode == "local":
+        return local_perceive(prompt, target_urls, category)
+
+    cache_key = _perceive_cache_key(prompt, target_urls)
+    cached = _perceive_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if mode == "local-then-llm-async":
+        _perceive_in_background(prompt, target_urls, category, cache_key)
+        return local_perceive(prompt, target_urls, category)
+
+    if deadline is None or not deadline.bounded:
+        return _llm_perceive(prompt, target_urls, category, cache_key)
+
+    budget = Deadline(deadline.remaining() * PERCEIVE_DEADLINE_SHARE)
+    try:
+        with budget.active():
+            return _llm_perceive(prompt, target_urls, category, cache_key)
+    except ResearchError:
+        return local_perceive(prompt, target_urls, category)
+
+
+def _perceive_in_background(prompt: str, target_urls: list[str], category: str, cache_key: str) -> None:
+    with _perceive_inflight_lock:
+        if cache_key in _perceive_inflight:
+            return
+        _perceive_inflight.add(cache_key)
+
+    def run():
+        try:
+            _llm_perceive(prompt, target_urls, category, cache_key)
+        except Exception:
+            pass
+        finally:
+            with _perceive_inflight_lock:
+                _perceive_inflight.discard(cache_key)
+
+    _perceive_background.submit(run)
+
+
+def _llm_perceive(prompt: str, target_urls: list[str], category: str, cache_key: str) -> dict:
     system = """You are an expert research planner. Analyze the user's research prompt and return a JSON object with:
 - "keywords": list of 5-10 relevant search keywords/phrases
 - "intent": one of "trend_discovery", "influencer_ranking", "content_ideation"
@@ -40,16 +119,15 @@ Return ONLY valid JSON, no markdown formatting or code blocks."""
 Target URLs: {json.dumps(target_urls) if target_urls else "None (use keyword search)"}"""
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=[
+        text = chat_completion(
+            "perceive",
+            [
                 {"role": "system", "content": system},
                 {"role": "user", "content": user_msg},
             ],
             temperature=0.3,
             max_tokens=800,
-        )
-        text = response.choices[0].message.content.strip()
+        ).strip()
         # Strip markdown code blocks if present
         if text.startswith("```"):
             text = text.split("\n", 1)[1] if "\n" in text else text[3:]
@@ -57,21 +135,32 @@ Target URLs: {json.dumps(target_urls) if target_urls else "None (use keyword sea
                 text = text[:-3]
             text = text.strip()
 
-        return json.loads(text)
+        perception = json.loads(text)
+        _perceive_cache.set(cache_key, perception)
+        return perception
     except json.JSONDecodeError:
-        # Fallback: extract basic keywords from prompt
-        words = prompt.lower().split()
-        return {
-            "keywords": words[:8],
-            "intent": "content_ideation",
-            "expanded_keywords": [],
-            "source_strategy": ["youtube", "reddit"],
-            "research_plan": f"Search for content related to: {prompt}",
-        }
+        # Fallback: build the plan with the local keyword engine
+        return local_perceive(prompt, target_urls, category)
+    except ResearchError:
+        raise
     except Exception as e:
         raise LLMError(f"Perceive phase failed: {str(e)}")
 
 
+def _perceive_cache_key(prompt: str, target_urls: list[str]) -> str:
+    normalized = " ".join(re.findall(r"\w+", prompt.lower()))
+    urls = "\n".join(sorted(u.strip().lower() for u in target_urls))
+    return hashlib.sha256(f"{normalized}\n{urls}".encode()).hexdigest()
+
+
+def invalidate_perceive_cache(prompt: str = None, target_urls: list[str] = None) -> None:
+    """Forget one cached perception, or all of them when no prompt is given."""
+    if prompt is None:
+        _perceive_cache.invalidate()
+    else:
+        _perceive_cache.invalidate(_perceive_cache_key(prompt, target_urls or []))
+
+
 # ──────────────────────────────────────────────
 # R — Reason
 # ──────────────────────────────────────────────
@@ -119,50 +208,176 @@ def _classify_url(url: str) -> str:
 # ──────────────────────────────────────────────
 # A — Act
 # ──────────────────────────────────────────────
-def act(reasoning: dict, num_results: int = 10, category: str = "", prompt: str = "", video_duration: str = "5-7 min") -> dict:
-    """Execute scraping, rank results, generate report."""
-    source_map = {
+def _build_source_map() -> dict:
+    return {
         "youtube": YouTubeSource(),
         "reddit": RedditSource(),
         "generic": GenericSource(),
     }
 
-    all_items: list[ContentItem] = []
-    errors: list[str] = []
 
-    for task in reasoning["scrape_plan"]:
-        source = source_map.get(task["source"], GenericSource())
-        try:
-            items = source.scrape(
-                url=task["url"],
-                keywords=task["keywords"],
-                time_window=task["time_window"],
-            )
-            all_items.extend(items)
-        except Exception as e:
-            errors.append(f"{task['source']}: {str(e)}")
-
-    # Rank
-    ranked = rank_items(all_items, reasoning["all_keywords"], num_results)
+def act(
+    reasoning: dict,
+    num_results: int = 10,
+    category: str = "",
+    prompt: str = "",
+    video_duration: str = "5-7 min",
+    deadline: Optional[Deadline] = None,
+) -> dict:
+    """Execute scraping, rank results, generate report."""
+    deadline = deadline or Deadline()
+    source_map = _build_source_map()
+    scraped = _scrape_and_rank(reasoning, source_map, num_results, deadline)
 
     # Generate YouTube script
+    deadline.check("script generation")
     report = generate_script(
         prompt=prompt,
         keywords=reasoning["all_keywords"],
         intent=reasoning["intent"],
-        ranked_items=ranked,
+        ranked_items=scraped.ranked,
         category=category,
         video_duration=video_duration,
     )
 
     return {
-        "ranked_items": ranked,
+        "ranked_items": scraped.ranked,
         "report_markdown": report,
-        "errors": errors,
-        "total_scraped": len(all_items),
+        "errors": scraped.errors,
+        "total_scraped": scraped.total_scraped,
+        "from_corpus": scraped.from_corpus,
+        "duplicates_merged": scraped.duplicates_merged,
+        "cut_off_sources": scraped.cut_off,
     }
 
 
+@dataclass
+class ScrapeSummary:
+    """What ``_scrape_and_rank`` found: the ranked items and how the scrape went."""
+    ranked: list[ContentItem]
+    total_scraped: int = 0  # items fetched from the sources in this run
+    from_corpus: int = 0  # items served from the corpus instead
+    duplicates_merged: int = 0
+    errors: list[str] = field(default_factory=list)
+    cut_off: list[str] = field(default_factory=list)  # sources cut off at the deadline or never awaited
+
+
+def _scrape_and_rank(
+    reasoning: dict,
+    source_map: dict,
+    limit: int,
+    deadline: Deadline,
+    good_enough_score: Optional[float] = None,
+) -> ScrapeSummary:
+    """Scrape within the deadline's scrape budget, ranking items as each source finishes,
+    then enrich only the items that made the cut.
+
+    Keyword searches the corpus already covers are answered from it first.
+    Each finished batch is deduplicated against everything scraped so far
+    before ranking, so one story found by several sources takes one slot.
+    The ranker holds only the top ``limit`` items, but the deduplicator keeps
+    every distinct item so that later copies can merge into it. With
+    ``good_enough_score``, waiting stops once every slot holds an item scoring
+    at least that much, and sources not yet started are never scraped. BM25
+    relevance needs every candidate before it can score any, so it keeps them
+    all and never stops early.
+    """
+    plan = reasoning["scrape_plan"]
+    scrape_deadline = Deadline(deadline.scrape_budget()) if deadline.bounded else None
+    dedup = Deduplicator()
+    ranker = TopKRanker(reasoning["all_keywords"], limit)
+    errors: list[tuple[int, str]] = []
+    cut_off: list[str] = []
+    finished: set[int] = set()
+    from_corpus = 0
+
+    outcomes = _plan_outcomes(plan, source_map, get_corpus(), scrape_deadline)
+    for outcome in outcomes:
+        finished.add(outcome.index)
+        if outcome.from_corpus:
+            from_corpus += len(outcome.items)
+        fresh, updated = dedup.add(outcome.items, order=outcome.index)
+        # Survivors ranked earlier may have taken on a better copy from this batch's duplicates.
+        ranker.update(updated)
+        ranker.add(fresh, order=outcome.index)
+        if outcome.error:
+            errors.append((outcome.index, outcome.error))
+        if outcome.cut_off and outcome.task["source"] not in cut_off:
+            cut_off.append(outcome.task["source"])
+        if good_enough_score is not None and len(finished) < len(plan) and ranker.full_above(good_enough_score):
+            outcomes.close()
+            for index, task in enumerate(plan):
+                if index not in finished:
+                    errors.append((index, f"{task['source']}: not awaited, enough strong candidates already ranked"))
+                    if task["source"] not in cut_off:
+                        cut_off.append(task["source"])
+            break
+
+    ranked = ranker.results()
+    enrich_timeout = ENRICH_DEADLINE
+    if deadline.bounded:
+        # Enrichment is optional, so it only gets time beyond the generation reserve.
+        enrich_timeout = min(ENRICH_DEADLINE, deadline.remaining() - GENERATION_RESERVE)
+    if enrich_timeout > 0:
+        enrich_items(ranked, reasoning["all_keywords"], source_map, deadline=enrich_timeout)
+    return ScrapeSummary(
+        ranked=ranked,
+        total_scraped=dedup.seen - from_corpus,
+        from_corpus=from_corpus,
+        duplicates_merged=dedup.merged,
+        errors=[message for _, message in sorted(errors)],
+        cut_off=cut_off,
+    )
+
+
+def _plan_outcomes(
+    plan: list[dict],
+    source_map: dict,
+    corpus: Optional[ContentCorpus],
+    deadline: Optional[Deadline],
+) -> Iterator[ScrapeOutcome]:
+    """Yield an outcome per plan task: corpus answers first, then the other tasks as they are scraped.
+
+    Scraped items are stored in the corpus before anyone else sees them.
+    """
+    remaining: list[tuple[int, dict]] = []
+    for index, task in enumerate(plan):
+        items = _answer_from_corpus(corpus, task)
+        if items:
+            yield ScrapeOutcome(index, task, items=items, from_corpus=True)
+        else:
+            remaining.append((index, task))
+
+    stream = get_executor().stream([task for _, task in remaining], source_map, deadline)
+    try:
+        for outcome in stream:
+            outcome.index = remaining[outcome.index][0]
+            if corpus is not None and outcome.items:
+                try:
+                    corpus.upsert(outcome.items)
+                except Exception:
+                    pass  # the corpus is an optimization; a failed write only costs a later scrape
+            yield outcome
+    finally:
+        stream.close()
+
+
+def _answer_from_corpus(corpus: Optional[ContentCorpus], task: dict) -> Optional[list[ContentItem]]:
+    """Fresh corpus items for a keyword search task, or None when it needs scraping."""
+    # Target URLs name a specific page or community, so only open keyword searches are answered.
+    if corpus is None or task["url"] or not task["keywords"]:
+        return None
+    try:
+        # Any one keyword can fill an OR search, so each must be covered before the scrape is skipped.
+        counts = corpus.keyword_counts(task["source"], task["keywords"], task["time_window"])
+        if not counts or min(counts.values()) < CORPUS_MIN_PER_KEYWORD:
+            return None
+        items = corpus.search(task["source"], task["keywords"], task["time_window"])
+    except Exception:
+        return None
+    return items if len(items) >= CORPUS_MIN_ITEMS else None
+
+
 # ──────────────────────────────────────────────
 # T — Track
 # ──────────────────────────────────────────────
@@ -189,16 +404,20 @@ def run_pipeline(
     category: str = "",
     num_results: int = 10,
     video_duration: str = "5-7 min",
+    perceive_mode: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
 ) -> dict:
-    """Run the full PRAT pipeline."""
-    # P — Perceive
-    perception = perceive(prompt, target_urls)
+    """Run the full PRAT pipeline, within ``deadline`` when one is given."""
+    deadline = deadline or Deadline()
+    with deadline.active():
+        # P — Perceive
+        perception = perceive(prompt, target_urls, category, perceive_mode, deadline)
 
-    # R — Reason
-    reasoning = reason(perception, target_urls, time_window)
+        # R — Reason
+        reasoning = reason(perception, target_urls, time_window)
 
-    # A — Act
-    results = act(reasoning, num_results, category, prompt, video_duration)
+        # A — Act
+        results = act(reasoning, num_results, category, prompt, video_duration, deadline)
 
     # T — Track
     record_id = track(
@@ -218,7 +437,10 @@ def run_pipeline(
         "results": [item.model_dump() for item in results["ranked_items"]],
         "stored_record_id": record_id,
         "total_scraped": results["total_scraped"],
+        "from_corpus": results["from_corpus"],
+        "duplicates_merged": results["duplicates_merged"],
         "errors": results.get("errors", []),
+        "cut_off_sources": results["cut_off_sources"],
     }
 
 
@@ -231,49 +453,51 @@ def run_topics_pipeline(
     category: str = "",
     num_titles: int = 3,
     time_window: str = "7d",
+    perceive_mode: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
 ) -> dict:
     """Run P/R/A scraping, then generate a list of topic titles."""
+    deadline = deadline or Deadline()
+    with deadline.active():
+        return _run_topics(target_urls, prompt, category, num_titles, time_window, perceive_mode, deadline)
+
+
+def _run_topics(
+    target_urls: list[str],
+    prompt: str,
+    category: str,
+    num_titles: int,
+    time_window: str,
+    perceive_mode: Optional[str],
+    deadline: Deadline,
+) -> dict:
     from app.core.markdown import generate_topics
 
     topic_prompt = prompt or f"trending {category} content on YouTube"
 
     # P — Perceive
-    perception = perceive(topic_prompt, target_urls)
+    perception = perceive(topic_prompt, target_urls, category, perceive_mode, deadline)
 
     # R — Reason
     reasoning = reason(perception, target_urls, time_window)
 
     # A — Scrape only (no script yet)
-    source_map = {
-        "youtube": YouTubeSource(),
-        "reddit": RedditSource(),
-        "generic": GenericSource(),
-    }
-    all_items: list[ContentItem] = []
-    for task in reasoning["scrape_plan"]:
-        source = source_map.get(task["source"], GenericSource())
-        try:
-            items = source.scrape(
-                url=task["url"],
-                keywords=task["keywords"],
-                time_window=task["time_window"],
-            )
-            all_items.extend(items)
-        except Exception:
-            pass
-
-    ranked = rank_items(all_items, reasoning["all_keywords"], max(num_titles * 3, 10))
+    source_map = _build_source_map()
+    scraped = _scrape_and_rank(
+        reasoning, source_map, max(num_titles * 3, 10), deadline, good_enough_score=TOPICS_GOOD_ENOUGH_SCORE or None,
+    )
 
     # Build a research context string from ranked items
     context_lines = []
-    for item in ranked:
+    for item in scraped.ranked:
         eng = ", ".join(f"{k}: {v}" for k, v in item.engagement.items())
         context_lines.append(
-            f"- {item.title} [{item.source}] | {eng} | {item.extracted_text[:200]}"
+            f"- {item.title} [{item.source}] | {eng} | {item.extracted_text[:CONTEXT_SNIPPET_CHARS]}"
         )
     research_context = "\n".join(context_lines)
 
     # Generate topic titles
+    deadline.check("topic generation")
     topics_text = generate_topics(
         prompt=prompt,
         category=category,
@@ -285,6 +509,8 @@ def run_topics_pipeline(
         "topics": topics_text,
         "context_snapshot": research_context,
         "keywords": reasoning["all_keywords"],
+        "errors": scraped.errors,
+        "cut_off_sources": scraped.cut_off,
     }
 
 
@@ -312,6 +538,72 @@ def run_script_pipeline(
         research_context=context_snapshot,
     )
 
+    record_id = _save_script_record(
+        topic, category, video_duration, broll_enabled, onscreen_text_enabled, original_prompt, script,
+    )
+
+    return {
+        "script": script,
+        "stored_record_id": record_id,
+    }
+
+
+_SECTION_LABEL = re.compile(r"\[(HOOK|INTRODUCTION|MAIN|KEY INSIGHTS|CONCLUSION)\]")
+_LONGEST_LABEL = len("[KEY INSIGHTS]")
+
+
+def stream_script_pipeline(
+    topic: str,
+    category: str = "",
+    video_duration: str = "5 min",
+    broll_enabled: bool = False,
+    onscreen_text_enabled: bool = False,
+    context_snapshot: str = "",
+    original_prompt: str = "",
+) -> Iterator[tuple[str, dict]]:
+    """Stream a script as (event, data) pairs and save the record once it completes.
+
+    Emits ``token`` events for each text delta, a ``section`` event whenever a
+    section label such as ``[HOOK]`` is completed, and a final ``done`` event
+    carrying the stored record id.
+    """
+    from app.core.markdown import stream_script
+
+    text = ""
+    scanned = 0
+    for delta in stream_script(
+        topic=topic,
+        category=category,
+        video_duration=video_duration,
+        broll_enabled=broll_enabled,
+        onscreen_text_enabled=onscreen_text_enabled,
+        research_context=context_snapshot,
+    ):
+        text += delta
+        yield "token", {"text": delta}
+
+        # A label can straddle deltas, so look back one label-length before the new text.
+        start = max(scanned, len(text) - len(delta) - _LONGEST_LABEL)
+        for match in _SECTION_LABEL.finditer(text, start):
+            scanned = match.end()
+            yield "section", {"section": match.group(1)}
+
+    script = text.strip()
+    record_id = _save_script_record(
+        topic, category, video_duration, broll_enabled, onscreen_text_enabled, original_prompt, script,
+    )
+    yield "done", {"stored_record_id": record_id}
+
+
+def _save_script_record(
+    topic: str,
+    category: str,
+    video_duration: str,
+    broll_enabled: bool,
+    onscreen_text_enabled: bool,
+    original_prompt: str,
+    script: str,
+) -> str:
     record = {
         "inputs": {
             "topic": topic,
@@ -327,10 +619,4 @@ def run_script_pipeline(
         "errors": [],
         "total_scraped": 0,
     }
-    record_id = save_record(record)
-
-    return {
-        "script": script,
-        "stored_record_id": record_id,
-    }
-
+    return save_record(record)
@@ -1,75 +1,321 @@
+import heapq
+import os
 import re
 from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+import numpy as np
+
 from app.sources.base import ContentItem
+from app.core.bm25 import BM25Index
+
+# Composite weights: 40% engagement, 25% recency, 35% keyword relevance
+ENGAGEMENT_WEIGHT = 0.40
+RECENCY_WEIGHT = 0.25
+KEYWORD_WEIGHT = 0.35
+
+# (minimum, score) tiers, highest first; below the last tier the floor applies.
+YOUTUBE_VIEW_TIERS = [(1_000_000, 1.0), (100_000, 0.8), (10_000, 0.6), (1_000, 0.4), (100, 0.2)]
+REDDIT_ACTIVITY_TIERS = [(5000, 1.0), (1000, 0.8), (500, 0.6), (100, 0.4), (10, 0.2)]
+ENGAGEMENT_FLOOR = 0.1
+GENERIC_ENGAGEMENT = 0.3
 
+# Keyword relevance backend: "substring" (share of keywords found in the text) or "bm25".
+RELEVANCE_BACKENDS = ("substring", "bm25")
+RANKING_RELEVANCE = os.getenv("RANKING_RELEVANCE", "substring")
 
-def rank_items(items: list[ContentItem], keywords: list[str], num_results: int = 10) -> list[ContentItem]:
+
+def rank_items(
+    items: list[ContentItem],
+    keywords: list[str],
+    num_results: int = 10,
+    relevance: Optional[str] = None,
+) -> list[ContentItem]:
     """Rank content items by composite score: engagement + recency + keyword relevance."""
     if not items:
         return []
+    scores = score_items(items, keywords, _relevance_index(keywords, relevance))
+    return [items[i] for i in top_k_indices(scores, num_results)]
+
+
+def score_items(
+    items: list[ContentItem],
+    keywords: list[str],
+    bm25: Optional[BM25Index] = None,
+    keyword_scores: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Score a batch of items at once, setting each ``relevance_score``; returns the rounded scores.
+
+    Keyword relevance is taken from ``keyword_scores`` when given, else from
+    ``bm25``, else from the substring scorer, which gives exactly the scores
+    of ``_compute_score`` applied item by item.
+    """
+    if not items:
+        return np.zeros(0)
+    if keyword_scores is None:
+        keyword_scores = bm25.add(items) if bm25 is not None else _keyword_relevances(items, keywords)
+    raw = (
+        ENGAGEMENT_WEIGHT * _engagement_scores(items)
+        + RECENCY_WEIGHT * _recency_scores(items)
+        + KEYWORD_WEIGHT * keyword_scores
+    )
+    # Python's round() is correctly rounded; np.round can differ in the last place.
+    rounded = [round(float(score), 4) for score in raw]
+    for item, score in zip(items, rounded):
+        item.relevance_score = score
+    return np.array(rounded)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> list[int]:
+    """Indices of the ``k`` highest scores, best first; ties keep the lower index."""
+    n = len(scores)
+    k = min(max(k, 0), n)
+    if k == 0:
+        return []
+    if k < n:
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        chosen = np.concatenate([above, tied])
+    else:
+        chosen = np.arange(n)
+    return chosen[np.lexsort((chosen, -scores[chosen]))].tolist()
+
+
+class TopKRanker:
+    """Keeps the ``k`` best-scoring items seen so far in a bounded min-heap.
+
+    Items that leave the heap are dropped, but their position is
+    remembered, so ``update`` can re-score them.
+
+    Items can be added in batches as sources finish. Ties go to the batch
+    with the lower ``order``, then to the item added first, so the result
+    matches ranking all items at once in that order.
+
+    BM25 relevance depends on document frequencies over the whole candidate
+    set, so with it each batch is only tokenized into the index as it
+    arrives; every candidate is kept and scored once, in ``results``.
+    """
+
+    def __init__(self, keywords: list[str], k: int, relevance: Optional[str] = None):
+        self.keywords = keywords
+        self.k = max(0, k)
+        self.seen = 0
+        # One index for the whole run, so every candidate is scored against the same statistics.
+        self._bm25 = _relevance_index(keywords, relevance)
+        # (score, reversed position, item): the heap root is the weakest item, latest on ties.
+        self._heap: list[tuple[float, tuple, ContentItem]] = []
+        # Item id -> reversed position for every item added, not only those in the heap: an evicted
+        # item that gains engagement from duplicates merged later can win its slot back.
+        self._added: dict[str, tuple] = {}
+        # BM25 only: item id -> (item, term frequencies, length) of every candidate.
+        self._indexed: dict[str, tuple[ContentItem, np.ndarray, float]] = {}
+
+    def add(self, items: Iterable[ContentItem], order: int = 0) -> None:
+        """Score and offer a batch; ``order`` places the batch relative to others on ties."""
+        items = list(items)
+        if not items:
+            return
+        base = self.seen
+        self.seen += len(items)
+        for i, item in enumerate(items):
+            self._added[item.id] = (-order, -(base + i))
+        if self._bm25 is not None:
+            self._index(items)
+            return
+
+        scores = score_items(items, self.keywords)
+        # Only the batch's own top k can displace anything already kept.
+        for i in top_k_indices(scores, self.k):
+            self._offer(items[i])
+
+    def update(self, items: Iterable[ContentItem]) -> None:
+        """Re-score items added earlier that have changed since, e.g. by merged duplicates."""
+        items = [item for item in items if item.id in self._added]
+        if not items:
+            return
+        if self._bm25 is not None:
+            # A merged duplicate may have replaced the item's text, so it is indexed afresh;
+            # ``results`` reads engagement when it scores.
+            self._bm25.forget(
+                np.array([self._indexed[item.id][1] for item in items]),
+                np.array([self._indexed[item.id][2] for item in items]),
+            )
+            self._index(items)
+            return
+
+        score_items(items, self.keywords)
+        ids = {item.id for item in items}
+        self._heap = [entry for entry in self._heap if entry[2].id not in ids]
+        heapq.heapify(self._heap)
+        for item in items:
+            self._offer(item)
+
+    def _index(self, items: list[ContentItem]) -> None:
+        tf, lengths = self._bm25.index(items)
+        for i, item in enumerate(items):
+            self._indexed[item.id] = (item, tf[i], lengths[i])
+
+    def _offer(self, item: ContentItem) -> None:
+        entry = (item.relevance_score, self._added[item.id], item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def __len__(self) -> int:
+        if self._bm25 is not None:
+            return min(self.k, len(self._indexed))
+        return len(self._heap)
+
+    def full_above(self, min_score: float) -> bool:
+        """True once all ``k`` slots hold items scoring at least ``min_score``.
+
+        Never true with BM25 relevance, whose scores are only known once every batch is in.
+        """
+        if self._bm25 is not None:
+            return False
+        return bool(self.k) and len(self._heap) == self.k and self._heap[0][0] >= min_score
 
-    scored = []
-    for item in items:
-        score = _compute_score(item, keywords)
-        item.relevance_score = round(score, 4)
-        scored.append(item)
+    def results(self) -> list[ContentItem]:
+        """The kept items, best first."""
+        if self._bm25 is not None:
+            return self._rank_candidates()
+        return [item for _, _, item in sorted(self._heap, key=lambda e: (e[0], e[1]), reverse=True)]
 
-    scored.sort(key=lambda x: x.relevance_score, reverse=True)
-    return scored[:num_results]
+    def _rank_candidates(self) -> list[ContentItem]:
+        if not self._indexed:
+            return []
+        # Plan order, so ties resolve as in ``add``.
+        candidates = [self._indexed[i] for i in sorted(self._indexed, key=self._added.__getitem__, reverse=True)]
+        items = [item for item, _, _ in candidates]
+        tf = np.array([row for _, row, _ in candidates])
+        lengths = np.array([length for _, _, length in candidates])
+        scores = score_items(items, self.keywords, keyword_scores=self._bm25.score(tf, lengths))
+        return [items[i] for i in top_k_indices(scores, self.k)]
 
 
-def _compute_score(item: ContentItem, keywords: list[str]) -> float:
+def _relevance_index(keywords: list[str], relevance: Optional[str]) -> Optional[BM25Index]:
+    relevance = relevance or RANKING_RELEVANCE
+    if relevance not in RELEVANCE_BACKENDS:
+        raise ValueError(f"Unknown relevance backend '{relevance}', expected one of {', '.join(RELEVANCE_BACKENDS)}")
+    return BM25Index(keywords) if relevance == "bm25" else None
+
+
+# ──────────────────────────────────────────────
+# Batch features
+# ──────────────────────────────────────────────
+def _tiered(values: np.ndarray, tiers: list[tuple[int, float]]) -> np.ndarray:
+    return np.select([values >= minimum for minimum, _ in tiers], [score for _, score in tiers], ENGAGEMENT_FLOOR)
+
+
+def _engagement_scores(items: list[ContentItem]) -> np.ndarray:
+    # Every copy of a deduplicated story is scored under its own source; the best one counts.
+    copies = [(i, source, engagement) for i, item in enumerate(items) for source, engagement in _copies(item)]
+    owners = np.array([owner for owner, _, _ in copies])
+    sources = np.array([source for _, source, _ in copies])
+    views = np.array([eng.get("views", 0) if source == "youtube" else 0 for _, source, eng in copies], dtype=float)
+    activity = np.array([
+        eng.get("score", 0) + eng.get("comments", 0) * 2 if source == "reddit" else 0
+        for _, source, eng in copies
+    ], dtype=float)
+    scores = np.select(
+        [sources == "youtube", sources == "reddit"],
+        [_tiered(views, YOUTUBE_VIEW_TIERS), _tiered(activity, REDDIT_ACTIVITY_TIERS)],
+        GENERIC_ENGAGEMENT,
+    )
+    best = np.zeros(len(items))
+    np.maximum.at(best, owners, scores)
+    return best
+
+
+def _copies(item: ContentItem) -> list[tuple[str, dict]]:
+    """(source, engagement) of the item and of each duplicate merged into it."""
+    duplicates = item.raw_metadata.get("duplicates") or []
+    return [(item.source, item.engagement)] + [
+        (copy.get("source", ""), copy.get("engagement") or {}) for copy in duplicates if isinstance(copy, dict)
+    ]
+
+
+def _recency_scores(items: list[ContentItem]) -> np.ndarray:
+    # Items from one source share a handful of date strings, so each distinct one is parsed once.
+    now = datetime.now(timezone.utc)
+    cache: dict[Optional[str], float] = {}
+    scores = np.empty(len(items))
+    for i, item in enumerate(items):
+        published = item.published_at
+        if published not in cache:
+            cache[published] = _recency_from_text(published, now)
+        scores[i] = cache[published]
+    return scores
+
+
+def _keyword_relevances(items: list[ContentItem], keywords: list[str]) -> np.ndarray:
+    """Vector form of ``_keyword_relevance``: each text and distinct keyword is lowercased once.
+
+    CPython's substring search beats a combined regex here, so each distinct
+    keyword gets one pass over all texts.
+    """
+    if not keywords:
+        return np.full(len(items), 0.5)
+
+    lowered = [kw.lower() for kw in keywords]
+    # Repeated keywords count once per occurrence, as in the per-item version.
+    counts: dict[str, int] = {}
+    for kw in lowered:
+        counts[kw] = counts.get(kw, 0) + 1
+    texts = [f"{item.title} {item.extracted_text}".lower() for item in items]
+    present = np.array([[kw in text for text in texts] for kw in counts], dtype=np.int64)
+    matches = np.array(list(counts.values()), dtype=np.int64) @ present
+    return np.minimum(matches / len(keywords) * 1.2, 1.0)
+
+
+# ──────────────────────────────────────────────
+# Per-item reference scoring
+# ──────────────────────────────────────────────
+# The scalar definition of each score; tests/test_ranking.py checks the batch path against it.
+def _compute_score(item: ContentItem, keywords: list[str], relevance: str = "substring") -> float:
     engagement_score = _engagement_score(item)
     recency_score = _recency_score(item)
-    keyword_score = _keyword_relevance(item, keywords)
+    if relevance == "bm25":
+        # On its own an item is a one-document corpus, so only term frequency and length matter.
+        keyword_score = float(BM25Index(keywords).add([item])[0])
+    else:
+        keyword_score = _keyword_relevance(item, keywords)
 
-    # Weighted composite: 40% engagement, 25% recency, 35% keyword relevance
-    return (0.40 * engagement_score) + (0.25 * recency_score) + (0.35 * keyword_score)
+    return (ENGAGEMENT_WEIGHT * engagement_score) + (RECENCY_WEIGHT * recency_score) + (KEYWORD_WEIGHT * keyword_score)
 
 
 def _engagement_score(item: ContentItem) -> float:
-    """Normalize engagement to a 0-1 scale."""
-    eng = item.engagement
-    if item.source == "youtube":
-        views = eng.get("views", 0)
-        if views >= 1_000_000:
-            return 1.0
-        elif views >= 100_000:
-            return 0.8
-        elif views >= 10_000:
-            return 0.6
-        elif views >= 1_000:
-            return 0.4
-        elif views >= 100:
-            return 0.2
-        return 0.1
+    """Normalize engagement to a 0-1 scale; a deduplicated story takes its best copy's."""
+    return max(engagement_score(source, engagement) for source, engagement in _copies(item))
 
-    elif item.source == "reddit":
-        score_val = eng.get("score", 0)
-        comments = eng.get("comments", 0)
-        combined = score_val + (comments * 2)
-        if combined >= 5000:
-            return 1.0
-        elif combined >= 1000:
-            return 0.8
-        elif combined >= 500:
-            return 0.6
-        elif combined >= 100:
-            return 0.4
-        elif combined >= 10:
-            return 0.2
-        return 0.1
 
-    return 0.3  # generic
+def engagement_score(source: str, engagement: dict) -> float:
+    """One copy's engagement on a 0-1 scale, by the tiers of the source it came from."""
+    if source == "youtube":
+        tiers, value = YOUTUBE_VIEW_TIERS, engagement.get("views", 0)
+    elif source == "reddit":
+        tiers, value = REDDIT_ACTIVITY_TIERS, engagement.get("score", 0) + (engagement.get("comments", 0) * 2)
+    else:
+        return GENERIC_ENGAGEMENT
+    for minimum, score in tiers:
+        if value >= minimum:
+            return score
+    return ENGAGEMENT_FLOOR
 
 
 def _recency_score(item: ContentItem) -> float:
     """Score based on how recently the content was published."""
-    if not item.published_at:
+    return _recency_from_text(item.published_at, datetime.now(timezone.utc))
+
+
+def _recency_from_text(published_at: Optional[str], now: datetime) -> float:
+    if not published_at:
         return 0.3
 
     # Try to parse relative time strings like "2 days ago"
-    published = item.published_at.lower()
+    published = published_at.lower()
     if "hour" in published or "minute" in published:
         return 1.0
     elif "day" in published:
@@ -92,7 +338,7 @@ def _recency_score(item: ContentItem) -> float:
     # Try ISO date parsing
     try:
         dt = datetime.fromisoformat(published.replace("Z", "+00:00"))
-        age_days = (datetime.now(timezone.utc) - dt).days
+        age_days = (now - dt).days
         if age_days <= 1:
             return 1.0
         elif age_days <= 7:
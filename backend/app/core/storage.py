@@ -1,56 +1,193 @@
 import json
 import os
+import sqlite3
+import threading
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Iterator, Optional
 
+from app.core.db import DATA_DIR, connect
 from app.core.errors import StorageError
 
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
+DB_PATH = os.path.join(DATA_DIR, "research_history.sqlite3")
+# Legacy store, imported once into the database and then renamed aside.
 HISTORY_FILE = os.path.join(DATA_DIR, "research_history.json")
 
+_conn: Optional[sqlite3.Connection] = None
+_conn_lock = threading.Lock()
+# Every thread shares one connection, and SQLite allows one open transaction per connection.
+_write_lock = threading.Lock()
 
-def _ensure_data_dir():
-    os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "w") as f:
-            json.dump([], f)
 
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    with _conn_lock:
+        if _conn is None:
+            try:
+                conn = connect(DB_PATH)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS records (
+                        id TEXT PRIMARY KEY,
+                        created_at TEXT NOT NULL,
+                        body TEXT NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_records_created_at ON records(created_at)")
+                # List views read this projection so they never deserialize record bodies.
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS record_summaries (
+                        id TEXT PRIMARY KEY,
+                        created_at TEXT NOT NULL,
+                        prompt TEXT NOT NULL,
+                        category TEXT NOT NULL,
+                        num_results INTEGER NOT NULL,
+                        total_scraped INTEGER NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_created ON record_summaries(created_at, id)")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_summaries_category ON record_summaries(category, created_at, id)"
+                )
+                migrate_json_history(conn)
+                _backfill_summaries(conn)
+            except sqlite3.Error as e:
+                raise StorageError(f"Failed to open history database: {e}")
+            _conn = conn
+        return _conn
 
-def load_history() -> list[dict]:
-    _ensure_data_dir()
+
+def migrate_json_history(conn: sqlite3.Connection, json_path: Optional[str] = None) -> int:
+    """Import records from the legacy JSON history file. Returns the number imported.
+
+    Safe to run from several workers at once: inserts are idempotent and the
+    file is renamed to ``*.migrated`` once its records are committed.
+    """
+    json_path = json_path or HISTORY_FILE
+    if not os.path.exists(json_path):
+        return 0
     try:
-        with open(HISTORY_FILE, "r") as f:
-            return json.load(f)
+        with open(json_path, "r") as f:
+            history = json.load(f)
     except (json.JSONDecodeError, FileNotFoundError):
-        return []
+        history = []
+
+    with _transaction(conn):
+        for record in history:
+            record.setdefault("id", str(uuid.uuid4()))
+            record.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+            _insert_record(conn, record, "INSERT OR IGNORE")
+
+    try:
+        os.replace(json_path, json_path + ".migrated")
+    except FileNotFoundError:
+        pass
+    return len(history)
+
+
+def _backfill_summaries(conn: sqlite3.Connection) -> None:
+    """Build summary rows for records stored before the projection existed."""
+    rows = conn.execute(
+        "SELECT body FROM records WHERE id NOT IN (SELECT id FROM record_summaries)"
+    ).fetchall()
+    if not rows:
+        return
+    with _transaction(conn):
+        for row in rows:
+            conn.execute(
+                "INSERT OR IGNORE INTO record_summaries VALUES (?, ?, ?, ?, ?, ?)",
+                _summary_row(json.loads(row["body"])),
+            )
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection) -> Iterator[None]:
+    """Run a write transaction, one thread at a time on the shared connection."""
+    with _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _summary_row(record: dict) -> tuple:
+    # Legacy records may hold null for any of these, and the summary columns are NOT NULL.
+    inputs = record.get("inputs") or {}
+    return (
+        record["id"],
+        record["created_at"],
+        inputs.get("prompt") or inputs.get("topic") or "",
+        inputs.get("category") or "",
+        len(record.get("selected_results") or []),
+        record.get("total_scraped") or 0,
+    )
+
+
+def _insert_record(conn: sqlite3.Connection, record: dict, verb: str = "INSERT") -> None:
+    conn.execute(
+        f"{verb} INTO records (id, created_at, body) VALUES (?, ?, ?)",
+        (record["id"], record["created_at"], json.dumps(record, default=str)),
+    )
+    conn.execute(f"{verb} INTO record_summaries VALUES (?, ?, ?, ?, ?, ?)", _summary_row(record))
 
 
 def save_record(record: dict) -> str:
-    _ensure_data_dir()
     record_id = str(uuid.uuid4())
     record["id"] = record_id
     record["created_at"] = datetime.now(timezone.utc).isoformat()
 
-    history = load_history()
-    history.append(record)
-
+    conn = _get_conn()
     try:
-        with open(HISTORY_FILE, "w") as f:
-            json.dump(history, f, indent=2, default=str)
-    except Exception as e:
+        with _transaction(conn):
+            _insert_record(conn, record)
+    except sqlite3.Error as e:
         raise StorageError(f"Failed to write history: {e}")
 
     return record_id
 
 
 def get_record_by_id(record_id: str) -> Optional[dict]:
-    history = load_history()
-    for record in history:
-        if record.get("id") == record_id:
-            return record
-    return None
+    row = _get_conn().execute("SELECT body FROM records WHERE id = ?", (record_id,)).fetchone()
+    return json.loads(row["body"]) if row else None
+
+
+def list_record_summaries(
+    limit: int = 50,
+    before: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """Return one page of record summaries, newest first, and the cursor for the next page.
 
+    ``before`` is the id of the last record on the previous page.
+    """
+    conn = _get_conn()
+    clauses, params = [], []
+    if before:
+        anchor = conn.execute("SELECT created_at FROM record_summaries WHERE id = ?", (before,)).fetchone()
+        if anchor is None:
+            return [], None
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend([anchor["created_at"], before])
+    if category:
+        clauses.append("category = ?")
+        params.append(category)
+    if since:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("created_at < ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = conn.execute(
+        f"SELECT * FROM record_summaries {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+        params + [limit + 1],
+    ).fetchall()
 
-def get_all_records() -> list[dict]:
-    return load_history()
+    summaries = [dict(row) for row in rows[:limit]]
+    next_cursor = summaries[-1]["id"] if len(rows) > limit else None
+    return summaries, next_cursor
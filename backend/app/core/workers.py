@@ -0,0 +1,128 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+from app.core.errors import ServiceBusyError
+
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+PIPELINE_QUEUE_DEPTH = int(os.getenv("PIPELINE_QUEUE_DEPTH", "16"))
+
+
+class PipelineWorkerPool:
+    """Bounded thread pool that keeps blocking pipelines off the event loop.
+
+    At most ``workers`` pipelines run at once and at most ``queue_depth`` more
+    wait for a slot; anything beyond that is rejected with ServiceBusyError
+    so callers get a fast 503 instead of an ever-growing queue.
+    """
+
+    def __init__(self, workers: int = PIPELINE_WORKERS, queue_depth: int = PIPELINE_QUEUE_DEPTH):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pipeline")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Admit ``fn`` and queue it, or raise ServiceBusyError when the pool is full.
+
+        The slot is held until ``fn`` has finished (or was cancelled before
+        starting), not until a caller stops waiting for it.
+        """
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise ServiceBusyError(f"{self._pending} pipeline runs in progress, try again shortly")
+            self._pending += 1
+        try:
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stream(self, fn: Callable[..., Iterable[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """Run the generator ``fn`` on a worker and return its items as an async iterator.
+
+        Admission happens here, before anything is iterated, so a full pool
+        raises ServiceBusyError while the caller can still answer 503. Once the
+        consumer stops, the generator is closed after its next item.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def put(entry: tuple) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, entry)
+            except RuntimeError:
+                stop.set()  # the event loop is gone; nobody is listening any more
+
+        def produce() -> None:
+            items = None
+            try:
+                items = fn(*args, **kwargs)
+                for item in items:
+                    if stop.is_set():
+                        return
+                    put((False, item))
+            except BaseException as e:
+                put((True, e))
+                return
+            finally:
+                close = getattr(items, "close", None)
+                if close is not None:
+                    close()
+            put((True, None))
+
+        self.submit(produce)
+        return self._drain(queue, stop)
+
+    @staticmethod
+    async def _drain(queue: asyncio.Queue, stop: threading.Event) -> AsyncIterator[Any]:
+        try:
+            while True:
+                finished, value = await queue.get()
+                if finished:
+                    if value is not None:
+                        raise value
+                    return
+                yield value
+        finally:
+            stop.set()
+
+    def _release(self, _: Optional[Future] = None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "running": min(pending, self.workers),
+            "queued": max(0, pending - self.workers),
+        }
+
+
+_pool: Optional[PipelineWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> PipelineWorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PipelineWorkerPool()
+        return _pool
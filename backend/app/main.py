@@ -1,4 +1,5 @@
 import os
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -6,6 +7,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from app.routes.research import router as research_router
+from app.sources.http import get_http_client
+from app.sources.parsing import get_parsing_service
 
 app = FastAPI(
     title="Dyut Research Agent",
@@ -24,6 +27,23 @@ app.add_middleware(
 app.include_router(research_router, prefix="/api")
 
 
+@app.on_event("startup")
+def warm_http_pools():
+    # Warm in the background so a slow upstream never delays startup.
+    threading.Thread(target=get_http_client().warm_up, daemon=True).start()
+
+
+@app.on_event("startup")
+def start_parser_workers():
+    get_parsing_service().warm_up()
+
+
+@app.on_event("shutdown")
+def close_http_pools():
+    get_http_client().close()
+    get_parsing_service().shutdown()
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
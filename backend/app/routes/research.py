@@ -1,13 +1,29 @@
-from fastapi import APIRouter, HTTPException
+import json
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional
-
-from app.core.pipeline import run_pipeline, run_topics_pipeline, run_script_pipeline
-from app.core.storage import get_all_records, get_record_by_id
+from typing import Literal, Optional
+
+from app.core.pipeline import (
+    invalidate_perceive_cache,
+    run_pipeline,
+    run_script_pipeline,
+    run_topics_pipeline,
+    stream_script_pipeline,
+)
+from app.core.storage import get_record_by_id, list_record_summaries
+from app.core.corpus import get_corpus
+from app.core.deadline import Deadline
 from app.core.errors import ResearchError
+from app.core.llm import get_stats as get_llm_stats
+from app.core.workers import get_worker_pool
+from app.sources.cache import get_response_cache
+from app.sources.ratelimit import get_host_guard
 
 router = APIRouter()
 
+PerceiveMode = Literal["llm", "local", "local-then-llm-async"]
+
 
 # ── Original request model (kept for /api/research backwards compat) ──
 class ResearchRequest(BaseModel):
@@ -18,6 +34,9 @@ class ResearchRequest(BaseModel):
     num_results: int = Field(default=10, ge=1, le=20)
     include_debug: bool = False
     video_duration: Optional[str] = "5-7 min"
+    perceive_mode: Optional[PerceiveMode] = None
+    # Seconds the whole run may take; sources still scraping when time runs short are cut off.
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, le=600)
 
 
 # ── Step 1: Generate topic titles ──
@@ -27,6 +46,8 @@ class TopicsRequest(BaseModel):
     target_urls: list[str] = Field(default_factory=list)
     num_titles: int = Field(default=3, ge=1, le=5)
     time_window: Optional[str] = "7d"
+    perceive_mode: Optional[PerceiveMode] = None
+    deadline_seconds: Optional[float] = Field(default=None, gt=0, le=600)
 
 
 # ── Step 2: Generate full script ──
@@ -44,13 +65,18 @@ class ScriptRequest(BaseModel):
 async def create_topics(request: TopicsRequest):
     if not request.prompt and not request.category:
         raise HTTPException(status_code=400, detail="Provide a prompt or select a category.")
+    # Started before queueing so time spent waiting for a worker counts against the budget.
+    deadline = Deadline.from_request(request.deadline_seconds)
     try:
-        result = run_topics_pipeline(
+        result = await get_worker_pool().run(
+            run_topics_pipeline,
             target_urls=request.target_urls,
             prompt=request.prompt or "",
             category=request.category or "",
             num_titles=request.num_titles,
             time_window=request.time_window or "7d",
+            perceive_mode=request.perceive_mode,
+            deadline=deadline,
         )
         return result
     except ResearchError as e:
@@ -62,7 +88,8 @@ async def create_topics(request: TopicsRequest):
 @router.post("/script")
 async def create_script(request: ScriptRequest):
     try:
-        result = run_script_pipeline(
+        result = await get_worker_pool().run(
+            run_script_pipeline,
             topic=request.topic,
             category=request.category or "",
             video_duration=request.video_duration or "5 min",
@@ -78,81 +105,67 @@ async def create_script(request: ScriptRequest):
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
 
-@router.post("/research")
-async def create_research(request: ResearchRequest):
+@router.post("/script/stream")
+async def create_script_stream(request: ScriptRequest):
     try:
-        result = run_pipeline(
-            target_urls=request.target_urls,
-            prompt=request.prompt,
-            time_window=request.time_window or "7d",
+        # Admitted like every other pipeline, so a full pool answers 503 before the stream opens.
+        events = get_worker_pool().stream(
+            stream_script_pipeline,
+            topic=request.topic,
             category=request.category or "",
-            num_results=request.num_results,
-            video_duration=request.video_duration or "5-7 min",
+            video_duration=request.video_duration or "5 min",
+            broll_enabled=request.broll_enabled,
+            onscreen_text_enabled=request.onscreen_text_enabled,
+            context_snapshot=request.context_snapshot or "",
+            original_prompt=request.original_prompt or "",
         )
-
-        response = {
-            "report_markdown": result["report_markdown"],
-            "results": result["results"],
-            "stored_record_id": result["stored_record_id"],
-        }
-
-        if request.include_debug:
-            response["total_scraped"] = result["total_scraped"]
-            response["errors"] = result["errors"]
-
-        return response
-
     except ResearchError as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
-
-
-@router.get("/history")
-async def get_history():
-    records = get_all_records()
-    summaries = []
-    for r in records:
-        summaries.append({
-            "id": r.get("id"),
-            "created_at": r.get("created_at"),
-            "prompt": r.get("inputs", {}).get("prompt") or r.get("inputs", {}).get("topic", ""),
-            "category": r.get("inputs", {}).get("category", ""),
-            "num_results": len(r.get("selected_results", [])),
-            "total_scraped": r.get("total_scraped", 0),
-        })
-    return {"history": list(reversed(summaries))}
+    return StreamingResponse(
+        _sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
-@router.get("/history/{record_id}")
-async def get_history_detail(record_id: str):
-    record = get_record_by_id(record_id)
-    if not record:
-        raise HTTPException(status_code=404, detail="Research record not found")
-    return record
-
+async def _sse(events):
+    """Format (event, data) pairs as Server-Sent Events, reporting failures as an error event."""
+    try:
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    except ResearchError as e:
+        yield f"event: error\ndata: {json.dumps({'detail': e.message})}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'detail': f'Internal error: {str(e)}'})}\n\n"
 
 
 @router.post("/research")
 async def create_research(request: ResearchRequest):
+    deadline = Deadline.from_request(request.deadline_seconds)
     try:
-        result = run_pipeline(
+        result = await get_worker_pool().run(
+            run_pipeline,
             target_urls=request.target_urls,
             prompt=request.prompt,
             time_window=request.time_window or "7d",
             category=request.category or "",
             num_results=request.num_results,
             video_duration=request.video_duration or "5-7 min",
+            perceive_mode=request.perceive_mode,
+            deadline=deadline,
         )
 
         response = {
             "report_markdown": result["report_markdown"],
             "results": result["results"],
             "stored_record_id": result["stored_record_id"],
+            "cut_off_sources": result["cut_off_sources"],
         }
 
         if request.include_debug:
             response["total_scraped"] = result["total_scraped"]
+            response["from_corpus"] = result["from_corpus"]
+            response["duplicates_merged"] = result["duplicates_merged"]
             response["errors"] = result["errors"]
 
         return response
@@ -164,25 +177,45 @@ async def create_research(request: ResearchRequest):
 
 
 @router.get("/history")
-async def get_history():
-    records = get_all_records()
-    # Return summaries only (without full markdown for list view)
-    summaries = []
-    for r in records:
-        summaries.append({
-            "id": r.get("id"),
-            "created_at": r.get("created_at"),
-            "prompt": r.get("inputs", {}).get("prompt", ""),
-            "category": r.get("inputs", {}).get("category", ""),
-            "num_results": len(r.get("selected_results", [])),
-            "total_scraped": r.get("total_scraped", 0),
-        })
-    return {"history": list(reversed(summaries))}
+def get_history(
+    limit: int = Query(default=50, ge=1, le=200),
+    before: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
+    summaries, next_cursor = list_record_summaries(
+        limit=limit,
+        before=before,
+        category=category,
+        since=since,
+        until=until,
+    )
+    return {"history": summaries, "next_cursor": next_cursor}
 
 
 @router.get("/history/{record_id}")
-async def get_history_detail(record_id: str):
+def get_history_detail(record_id: str):
     record = get_record_by_id(record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Research record not found")
     return record
+
+
+@router.delete("/cache/perceive")
+def clear_perceive_cache():
+    invalidate_perceive_cache()
+    return {"status": "cleared"}
+
+
+@router.get("/status")
+def get_status():
+    cache = get_response_cache()
+    corpus = get_corpus()
+    return {
+        "hosts": get_host_guard().stats(),
+        "workers": get_worker_pool().stats(),
+        "llm": get_llm_stats(),
+        "http_cache": cache.stats() if cache is not None else None,
+        "corpus": corpus.stats() if corpus is not None else None,
+    }
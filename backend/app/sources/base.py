@@ -1,8 +1,14 @@
+import os
 from abc import ABC, abstractmethod
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Callable, Optional
 from datetime import datetime
 
+from app.sources.cache import get_response_cache
+from app.sources.http import TEXT_CONTENT_TYPES, HttpResponse, get_http_client
+
+MAX_RESPONSE_BYTES = int(os.getenv("MAX_RESPONSE_BYTES", str(8 * 1024 * 1024)))
+
 
 class ContentItem(BaseModel):
     id: str = ""
@@ -19,23 +25,60 @@ class ContentItem(BaseModel):
 
 class ContentSource(ABC):
     source_name: str = "generic"
+    cache_ttl: int = 0  # seconds a fetched page may be served from the response cache
+    supports_enrichment: bool = False
+    max_bytes: int = MAX_RESPONSE_BYTES  # downloads are cut off past this many bytes
+    content_types: tuple[str, ...] = TEXT_CONTENT_TYPES  # other responses are skipped unread
 
     @abstractmethod
     def scrape(self, url: str, keywords: list[str], time_window: str = "7d") -> list[ContentItem]:
         """Scrape the given URL and return content items."""
         pass
 
-    def _safe_request(self, url: str, headers: dict = None) -> Optional[str]:
-        import requests
-        default_headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-        if headers:
-            default_headers.update(headers)
+    def fetch_enrichment(self, item: ContentItem, keywords: list[str]) -> Optional[str]:
+        """Return extra text to fold into a top-ranked item, or None if there is nothing to add."""
+        return None
+
+    def _safe_request(
+        self,
+        url: str,
+        headers: dict = None,
+        cache_ttl: Optional[int] = None,
+        stop: Optional[Callable[[bytearray], bool]] = None,
+    ) -> Optional[str]:
+        resp = self._fetch(url, headers, cache_ttl, stop=stop)
+        return resp.text if resp else None
+
+    def _fetch(
+        self,
+        url: str,
+        headers: dict = None,
+        cache_ttl: Optional[int] = None,
+        stop: Optional[Callable[[bytearray], bool]] = None,
+    ) -> Optional[HttpResponse]:
+        """Fetch a URL through the response cache; None on network or HTTP errors.
+
+        The body is streamed under this source's ``max_bytes`` and
+        ``content_types`` limits; ``stop`` may end the download early once the
+        caller has what it needs.
+        """
+        body_options = {"max_bytes": self.max_bytes, "content_types": self.content_types, "stop": stop}
+        try:
+            cache = get_response_cache()
+            if cache is not None:
+                ttl = self.cache_ttl if cache_ttl is None else cache_ttl
+                resp = cache.fetch(get_http_client(), url, headers=headers, ttl=ttl, **body_options)
+            else:
+                resp = get_http_client().get(url, headers=headers, **body_options)
+            return resp if resp.ok else None
+        except Exception:
+            return None
+
+    def _safe_post_json(self, url: str, payload: dict, headers: dict = None) -> Optional[str]:
         try:
-            resp = requests.get(url, headers=default_headers, timeout=15)
-            resp.raise_for_status()
+            resp = get_http_client().post_json(url, payload, headers=headers, max_bytes=self.max_bytes)
+            if not resp.ok:
+                return None
             return resp.text
         except Exception:
             return None
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.core.db import DATA_DIR, connect
+from app.sources.http import HttpClient, HttpResponse
+
+CACHE_PATH = os.path.join(DATA_DIR, "http_cache.sqlite3")
+CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1").lower() in {"1", "true", "yes"}
+
+# Response headers worth keeping alongside the body.
+_KEPT_HEADERS = ("content-type", "etag", "last-modified")
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase scheme/host, sort query params and drop the fragment."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+def cache_key(url: str, headers: dict = None) -> str:
+    header_part = "\n".join(f"{k.lower()}:{v}" for k, v in sorted((headers or {}).items()))
+    return hashlib.sha256(f"{normalize_url(url)}\n{header_part}".encode()).hexdigest()
+
+
+class ResponseCache:
+    """Disk-backed HTTP response cache with TTLs, revalidation and LRU eviction.
+
+    Bodies are zlib-compressed in a SQLite table. Fresh entries are served
+    without touching the network; stale entries carrying an ETag or
+    Last-Modified are revalidated with a conditional request, and a 304
+    refreshes them in place. When the stored bodies exceed ``max_bytes`` the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                encoding TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                truncated INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "truncated" not in columns:
+            # Caches written before truncation was tracked only ever stored complete bodies.
+            self._conn.execute("ALTER TABLE responses ADD COLUMN truncated INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+
+    def fetch(self, client: HttpClient, url: str, headers: dict = None, ttl: int = 0, **body_options) -> HttpResponse:
+        """Return a response for ``url``, from the cache when possible.
+
+        ``body_options`` (max_bytes, content_types, stop) are passed to ``client.get``.
+        A body that was cut short is only served to callers it fully answers:
+        ones whose ``max_bytes`` it reaches or whose ``stop`` check it satisfies.
+        """
+        if ttl <= 0:
+            return client.get(url, headers=headers, **body_options)
+
+        key = cache_key(url, headers)
+        row = self._lookup(key)
+        now = time.time()
+        cached = self._serve(row, body_options.get("max_bytes"), body_options.get("stop")) if row is not None else None
+        if cached is None:
+            row = None  # a cut-off body too short for this caller; its validators would only confirm it
+
+        if row is not None and row["expires_at"] > now:
+            self._count("hits")
+            return cached
+
+        request_headers = dict(headers or {})
+        if row is not None:
+            cached_headers = json.loads(row["headers"])
+            if cached_headers.get("etag"):
+                request_headers["If-None-Match"] = cached_headers["etag"]
+            if cached_headers.get("last-modified"):
+                request_headers["If-Modified-Since"] = cached_headers["last-modified"]
+
+        resp = client.get(url, headers=request_headers, **body_options)
+
+        if resp.status_code == 304 and row is not None:
+            self._count("revalidated")
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE responses SET stored_at = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                    (now, now + ttl, now, key),
+                )
+            return cached
+
+        self._count("misses")
+        if resp.status_code == 200:
+            self._store(key, resp, ttl)
+        return resp
+
+    def _lookup(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return row
+
+    def _store(self, key: str, resp: HttpResponse, ttl: int) -> None:
+        body = zlib.compress(resp.content, 6)
+        if len(body) > self.max_bytes:
+            return
+        headers = {k: resp.headers[k] for k in _KEPT_HEADERS if k in resp.headers}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, resp.url, resp.status_code, json.dumps(headers), resp.encoding,
+                 body, len(body), now, now + ttl, now, int(resp.truncated)),
+            )
+            self._counters["stores"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for row in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (row["key"],))
+            self._counters["evictions"] += 1
+            total -= row["size"]
+            if total <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _serve(row, max_bytes: Optional[int], stop: Optional[Callable[[bytearray], bool]]) -> Optional[HttpResponse]:
+        """The cached response as this caller would have read it, or None if a cut-off body falls short."""
+        content = zlib.decompress(row["body"])
+        truncated = bool(row["truncated"])
+        if max_bytes and len(content) >= max_bytes:
+            content, truncated = content[:max_bytes], True
+        elif truncated and not (stop is not None and stop(bytearray(content))):
+            return None
+        return HttpResponse(
+            url=row["url"],
+            status_code=row["status_code"],
+            headers=json.loads(row["headers"]),
+            content=content,
+            encoding=row["encoding"],
+            truncated=truncated,
+        )
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return {**self._counters, "entries": entries, "size_bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when HTTP_CACHE_ENABLED is off."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,310 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.deadline import current_deadline
+from app.core.errors import DeadlineExceededError
+from app.sources.ratelimit import get_host_guard
+
+try:
+    import httpx
+except ImportError:  # HTTP/2 support is optional
+    httpx = None
+
+try:
+    import h2  # noqa: F401 — httpx speaks HTTP/2 only with the h2 package (httpx[http2])
+except ImportError:
+    h2 = None
+
+try:
+    import brotli  # noqa: F401 — lets urllib3 decode "br" responses
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "4"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "").lower() in {"1", "true", "yes"}
+
+logger = logging.getLogger(__name__)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Content types worth downloading for text extraction; PDFs, images and other binaries are not.
+TEXT_CONTENT_TYPES = ("text/", "application/json", "application/xml", "application/xhtml+xml", "application/ld+json")
+
+# Hosts we hit on nearly every request get their own, larger pool.
+HOST_POOL_SIZES = {
+    "www.youtube.com": 8,
+    "old.reddit.com": 8,
+}
+WARM_HOSTS = list(HOST_POOL_SIZES)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+
+class UnsupportedContentType(Exception):
+    """Raised before the body is read when a response's Content-Type isn't accepted."""
+
+
+@dataclass
+class HttpResponse:
+    url: str
+    status_code: int
+    headers: dict = field(default_factory=dict)
+    content: bytes = b""
+    encoding: Optional[str] = None
+    truncated: bool = False  # body was cut off at max_bytes or by the caller's stop check
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def charset(self) -> Optional[str]:
+        """The charset declared in Content-Type, if any (unlike ``encoding``, never guessed)."""
+        for param in self.headers.get("content-type", "").split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "charset" and value:
+                return value.strip("'\"")
+        return None
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HttpClient:
+    """Process-wide HTTP client with keep-alive connection pools.
+
+    Uses a pooled ``requests.Session`` by default, or an ``httpx.Client``
+    speaking HTTP/2 when HTTP2_ENABLED is set and httpx[http2] is installed.
+    Bodies are decompressed (gzip, deflate, and brotli when available) by the
+    underlying library.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        http2: bool = HTTP2_ENABLED,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = bool(http2 and httpx is not None and h2 is not None)
+        if http2 and not self.http2:
+            logger.warning("HTTP2_ENABLED is set but httpx[http2] is not installed; using HTTP/1.1")
+        if self.http2:
+            self._client = httpx.Client(
+                http2=True,
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=sum(HOST_POOL_SIZES.values()) + POOL_MAXSIZE * 4,
+                    max_keepalive_connections=sum(HOST_POOL_SIZES.values()),
+                ),
+            )
+        else:
+            self._client = self._build_session()
+
+    @staticmethod
+    def _build_session() -> requests.Session:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=POOL_MAXSIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        for host, size in HOST_POOL_SIZES.items():
+            session.mount(f"https://{host}", HTTPAdapter(pool_connections=1, pool_maxsize=size))
+        return session
+
+    def get(
+        self,
+        url: str,
+        headers: dict = None,
+        max_bytes: Optional[int] = None,
+        content_types: Optional[tuple[str, ...]] = None,
+        stop: Optional[Callable[[bytearray], bool]] = None,
+    ) -> HttpResponse:
+        """Fetch a URL. Network errors propagate; HTTP error statuses do not.
+
+        Any of the body options switch to a streamed download:
+        ``content_types`` rejects the response (UnsupportedContentType) before
+        the body is read unless its Content-Type starts with one of them,
+        ``max_bytes`` stops after that many decompressed bytes, and ``stop`` is
+        called with the body received so far after each chunk and ends the
+        download when it returns True.
+        """
+        if max_bytes or content_types or stop:
+            return self._guarded(url, lambda: self._stream("GET", url, headers, max_bytes, content_types, stop))
+        return self._guarded(url, lambda: self._request("GET", url, headers=headers))
+
+    def post_json(self, url: str, payload: dict, headers: dict = None, max_bytes: Optional[int] = None) -> HttpResponse:
+        if max_bytes:
+            return self._guarded(url, lambda: self._stream("POST", url, headers, max_bytes, json=payload))
+        return self._guarded(url, lambda: self._request("POST", url, headers=headers, json=payload))
+
+    @staticmethod
+    def _guarded(url: str, send: Callable[[], HttpResponse]) -> HttpResponse:
+        """Send under the host's rate limit and circuit breaker, recording the outcome."""
+        host = urlsplit(url).netloc.lower()
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceededError(f"no time left to fetch {url}")
+        guard = get_host_guard()
+        guard.acquire(host)
+        try:
+            resp = send()
+        except UnsupportedContentType:
+            guard.record(host, status_code=200)  # the host answered fine
+            raise
+        except Exception as e:
+            if deadline is not None and deadline.expired():
+                guard.abandon(host)  # our own deadline cut it short; not the host's fault
+            else:
+                guard.record(host, error=e)
+            raise
+        guard.record(host, status_code=resp.status_code, retry_after=_retry_after(resp.headers))
+        return resp
+
+    def _timeouts(self) -> tuple[float, float]:
+        """(connect, read) timeouts, shortened to the time left on the active deadline."""
+        deadline = current_deadline()
+        if deadline is None:
+            return self.connect_timeout, self.read_timeout
+        return deadline.cap(self.connect_timeout), deadline.cap(self.read_timeout)
+
+    def _request(self, method: str, url: str, headers: dict = None, **kwargs) -> HttpResponse:
+        connect_timeout, read_timeout = self._timeouts()
+        if self.http2:
+            resp = self._client.request(
+                method, url, headers=headers, timeout=httpx.Timeout(read_timeout, connect=connect_timeout), **kwargs,
+            )
+            return HttpResponse(
+                url=str(resp.url),
+                status_code=resp.status_code,
+                headers={k.lower(): v for k, v in resp.headers.items()},
+                content=resp.content,
+                encoding=resp.encoding,
+            )
+
+        resp = self._client.request(method, url, headers=headers, timeout=(connect_timeout, read_timeout), **kwargs)
+        return HttpResponse(
+            url=resp.url,
+            status_code=resp.status_code,
+            headers={k.lower(): v for k, v in resp.headers.items()},
+            content=resp.content,
+            encoding=resp.encoding,
+        )
+
+    def _stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict],
+        max_bytes: Optional[int] = None,
+        content_types: Optional[tuple[str, ...]] = None,
+        stop: Optional[Callable[[bytearray], bool]] = None,
+        **kwargs,
+    ) -> HttpResponse:
+        connect_timeout, read_timeout = self._timeouts()
+        if self.http2:
+            timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+            with self._client.stream(method, url, headers=headers, timeout=timeout, **kwargs) as resp:
+                response_headers = {k.lower(): v for k, v in resp.headers.items()}
+                _check_content_type(response_headers, content_types)
+                content, truncated = _read_capped(resp.iter_bytes(), max_bytes, stop)
+                return HttpResponse(
+                    url=str(resp.url),
+                    status_code=resp.status_code,
+                    headers=response_headers,
+                    content=content,
+                    encoding=resp.encoding,
+                    truncated=truncated,
+                )
+
+        resp = self._client.request(
+            method, url, headers=headers, timeout=(connect_timeout, read_timeout), stream=True, **kwargs,
+        )
+        try:
+            response_headers = {k.lower(): v for k, v in resp.headers.items()}
+            _check_content_type(response_headers, content_types)
+            content, truncated = _read_capped(resp.iter_content(STREAM_CHUNK_SIZE), max_bytes, stop)
+        finally:
+            # An unfinished body can't be reused, so this drops the connection when truncated.
+            resp.close()
+        return HttpResponse(
+            url=resp.url,
+            status_code=resp.status_code,
+            headers=response_headers,
+            content=content,
+            encoding=resp.encoding,
+            truncated=truncated,
+        )
+
+    def warm_up(self, hosts: list[str] = None) -> None:
+        """Open a pooled connection to each host so the first real fetch skips the handshake."""
+        hosts = hosts or WARM_HOSTS
+        with ThreadPoolExecutor(max_workers=len(hosts) or 1) as pool:
+            list(pool.map(self._warm_host, hosts))
+
+    def _warm_host(self, host: str) -> None:
+        try:
+            if self.http2:
+                self._client.head(f"https://{host}/")
+            else:
+                self._client.head(f"https://{host}/", timeout=(self.connect_timeout, self.read_timeout))
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def _retry_after(headers: dict) -> Optional[float]:
+    try:
+        return float(headers.get("retry-after", ""))
+    except ValueError:
+        return None  # HTTP-date form; the breaker's own reset timeout applies
+
+
+def _check_content_type(headers: dict, content_types: Optional[tuple[str, ...]]) -> None:
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    # A missing Content-Type is let through; the parsers cope with unexpected bodies.
+    if content_types and content_type and not content_type.startswith(content_types):
+        raise UnsupportedContentType(content_type)
+
+
+def _read_capped(chunks, max_bytes: Optional[int], stop: Optional[Callable[[bytearray], bool]] = None) -> tuple[bytes, bool]:
+    body = bytearray()
+    for chunk in chunks:
+        body += chunk
+        if max_bytes and len(body) >= max_bytes:
+            return bytes(body[:max_bytes]), True
+        if stop is not None and stop(body):
+            return bytes(body), True
+    return bytes(body), False
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
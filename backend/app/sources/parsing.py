@@ -0,0 +1,306 @@
+import os
+import re
+import threading
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# This module is imported by parser worker processes, so it must stay free of app imports.
+# Parsers take the raw response bytes and return ContentItem field dicts.
+
+PARSE_POOL_SIZE = int(os.getenv("PARSE_POOL_SIZE", str(min(4, os.cpu_count() or 1))))  # 0 parses in-process
+PARSE_TIMEOUT = float(os.getenv("PARSE_TIMEOUT", "10"))
+
+
+# Budgets for the generic extractor; parsing stops once none of them can change the output.
+GENERIC_MAX_HEADINGS = 10
+GENERIC_MAX_PARAGRAPHS = 20
+GENERIC_MAX_CHARS = 3000
+_FEED_CHUNK = 64 * 1024
+_SKIPPED_TAGS = frozenset({"script", "style", "nav", "footer", "header"})
+_HEADING_TAGS = frozenset({"h1", "h2", "h3"})
+_TEXT_TAGS = _HEADING_TAGS | {"p", "a", "title"}
+
+
+def _element_text(el) -> str:
+    """Equivalent of BeautifulSoup's ``get_text(strip=True)``."""
+    return "".join(s.strip() for s in el.itertext())
+
+
+def _pull_events(parser, content: bytes):
+    for offset in range(0, len(content), _FEED_CHUNK):
+        parser.feed(content[offset:offset + _FEED_CHUNK])
+        yield from parser.read_events()
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:  # empty document
+        return
+    yield from parser.read_events()
+
+
+def parse_generic_html(content: bytes, url: str, encoding: Optional[str] = None) -> list[dict]:
+    """Extract title, headings and paragraphs from a page in one streaming pass.
+
+    The document is fed to lxml's pull parser in chunks and elements are
+    discarded as soon as they are read, so no full tree is kept. Feeding stops
+    once the heading, paragraph and character budgets are all spent; links are
+    counted over the part of the page that was parsed.
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+    title: Optional[str] = None
+    # (document position, text) pairs; nested elements finish out of document order,
+    # so the lists are sorted and cut to budget whenever no text element is open.
+    headings: list[tuple[int, str]] = []
+    paragraphs: list[tuple[int, str]] = []
+    link_count = 0
+    skip_depth = 0  # > 0 while inside a tag whose content is dropped
+    open_text: list[int] = []  # positions of open elements whose text we'll still read
+    position = 0
+
+    for event, el in _pull_events(parser, content):
+        tag = el.tag if isinstance(el.tag, str) else ""
+        if event == "start":
+            if tag in _SKIPPED_TAGS:
+                skip_depth += 1
+            elif tag in _TEXT_TAGS and not skip_depth:
+                open_text.append(position)
+                position += 1
+            continue
+
+        if tag in _SKIPPED_TAGS:
+            skip_depth -= 1
+            el.clear(keep_tail=True)
+            continue
+        if skip_depth:
+            continue
+        if tag in _TEXT_TAGS:
+            start = open_text.pop()
+            text = _element_text(el)
+            if tag == "title":
+                if title is None:
+                    title = text
+            elif tag == "a":
+                if el.get("href") is not None and len(text) > 10:
+                    link_count += 1
+            elif tag == "p":
+                if len(text) > 30:
+                    paragraphs.append((start, text))
+            elif text:
+                headings.append((start, text))
+        if open_text:
+            continue
+
+        headings = sorted(headings)[:GENERIC_MAX_HEADINGS]
+        paragraphs = sorted(paragraphs)[:GENERIC_MAX_PARAGRAPHS]
+        if len(headings) == GENERIC_MAX_HEADINGS and (
+            len(paragraphs) == GENERIC_MAX_PARAGRAPHS
+            or sum(len(t) for _, t in headings + paragraphs) >= GENERIC_MAX_CHARS
+        ):
+            break
+        # Nothing above still needs this subtree's text; drop it and any siblings already read.
+        el.clear(keep_tail=True)
+        parent = el.getparent()
+        while parent is not None and el.getprevious() is not None:
+            del parent[0]
+
+    headings_text = [t for _, t in sorted(headings)[:GENERIC_MAX_HEADINGS]]
+    paragraphs_text = [t for _, t in sorted(paragraphs)[:GENERIC_MAX_PARAGRAPHS]]
+    title = url if title is None else title
+    extracted_text = "\n\n".join(
+        [f"# {title}"]
+        + [f"## {h}" for h in headings_text]
+        + paragraphs_text
+    )
+
+    return [
+        dict(
+            id=str(uuid.uuid4()),
+            source="generic",
+            url=url,
+            title=title,
+            extracted_text=extracted_text[:GENERIC_MAX_CHARS],
+            engagement={},
+            raw_metadata={
+                "headings": headings_text,
+                "link_count": link_count,
+            },
+        )
+    ]
+
+
+def parse_reddit_html(content: bytes, url: str, encoding: Optional[str] = None) -> list[dict]:
+    soup = BeautifulSoup(content, "lxml", from_encoding=encoding)
+    items = []
+
+    # old.reddit.com uses div.thing for each post
+    posts = soup.select("div.thing.link")
+    if not posts:
+        # Fallback: try other selectors
+        posts = soup.select("[data-fullname]")
+
+    for post in posts[:20]:
+        try:
+            # Title
+            title_el = post.select_one("a.title, a.search-title")
+            title = title_el.get_text(strip=True) if title_el else ""
+            post_url = title_el.get("href", "") if title_el else ""
+            if post_url and not post_url.startswith("http"):
+                post_url = f"https://old.reddit.com{post_url}"
+
+            # Author
+            author_el = post.select_one("a.author")
+            author = author_el.get_text(strip=True) if author_el else "[deleted]"
+
+            # Score
+            score_el = post.select_one("div.score.unvoted, span.score.unvoted")
+            score_text = score_el.get_text(strip=True) if score_el else "0"
+            score = parse_score(score_text)
+
+            # Comments
+            comments_el = post.select_one("a.comments")
+            comments_text = comments_el.get_text(strip=True) if comments_el else "0"
+            comments_match = re.search(r'(\d+)', comments_text)
+            comments = int(comments_match.group(1)) if comments_match else 0
+
+            # Time
+            time_el = post.select_one("time")
+            published = time_el.get("datetime", "") if time_el else ""
+
+            # Subreddit
+            sub_el = post.select_one("a.subreddit")
+            subreddit = sub_el.get_text(strip=True) if sub_el else ""
+
+            # Post id and comments permalink
+            fullname = post.get("data-fullname", "")
+            post_id = fullname[3:] if fullname.startswith("t3_") else ""
+            permalink = comments_el.get("href", "") if comments_el else ""
+
+            if title:
+                items.append(dict(
+                    id=str(uuid.uuid4()),
+                    source="reddit",
+                    url=post_url,
+                    title=title,
+                    author=author,
+                    published_at=published,
+                    extracted_text=title,
+                    engagement={"score": score, "comments": comments},
+                    raw_metadata={"subreddit": subreddit, "post_id": post_id, "permalink": permalink},
+                ))
+        except Exception:
+            continue
+
+    return items
+
+
+def parse_score(text: str) -> int:
+    text = text.strip().lower().replace(",", "")
+    if text in ("•", "-", ""):
+        return 0
+    try:
+        if "k" in text:
+            return int(float(text.replace("k", "")) * 1000)
+        return int(text)
+    except ValueError:
+        return 0
+
+
+def _noop(_: int) -> None:
+    return None
+
+
+class ParsingService:
+    """Runs HTML parsers in a pool of worker processes so parsing doesn't hold the GIL.
+
+    Only the raw bytes, URL and declared encoding cross the process boundary.
+    With ``workers=0`` parsing happens in the calling thread.
+    """
+
+    def __init__(self, workers: int = PARSE_POOL_SIZE, timeout: float = PARSE_TIMEOUT):
+        self.workers = max(0, workers)
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers == 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs threads can deadlock the child
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def parse(self, parser: Callable[..., list[dict]], content: bytes, url: str, encoding: Optional[str] = None) -> list[dict]:
+        """Run ``parser`` on a worker, raising TimeoutError if it exceeds the per-task timeout.
+
+        A running task can't be cancelled, so on timeout the pool is replaced and
+        its workers are killed; parses still in flight on it fall back to parsing inline.
+        """
+        pool = self._get_pool()
+        if pool is None:
+            return parser(content, url, encoding)
+        try:
+            future = pool.submit(parser, content, url, encoding)
+        except BrokenProcessPool:
+            self._reset()
+            return parser(content, url, encoding)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            self._recycle(pool)
+            raise
+        except BrokenProcessPool:
+            self._reset()
+            return parser(content, url, encoding)
+
+    def warm_up(self) -> None:
+        """Start every worker now so the first parse doesn't pay the process start-up cost."""
+        pool = self._get_pool()
+        if pool is None:
+            return
+        try:
+            list(pool.map(_noop, range(self.workers)))
+        except BrokenProcessPool:
+            self._reset()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _reset(self) -> None:
+        with self._lock:
+            self._pool = None
+
+    def _recycle(self, pool: ProcessPoolExecutor) -> None:
+        """Drop ``pool`` and kill its workers, freeing the slot a hung parser holds."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        # The executor has no public way to stop a running task before Python 3.14.
+        processes = list((getattr(pool, "_processes", None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+
+_service: Optional[ParsingService] = None
+_service_lock = threading.Lock()
+
+
+def get_parsing_service() -> ParsingService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ParsingService()
+        return _service
@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+from typing import Optional
+
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "5"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "5"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "60"))
+
+# (requests per second, burst) for hosts that throttle harder than the default.
+HOST_RATE_LIMITS = {
+    "www.youtube.com": (4.0, 8),
+    "old.reddit.com": (1.0, 5),
+}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose breaker is open."""
+
+    def __init__(self, host: str, retry_in: float):
+        self.host = host
+        self.retry_in = retry_in
+        super().__init__(f"circuit open for {host}, retrying in {retry_in:.0f}s")
+
+
+class RateLimitedError(Exception):
+    """Raised when a request would wait longer than the allowed time for a token."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(rate, 0.001)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """Take a token, returning how long to wait before using it, or None if that exceeds ``max_wait``."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            # Tokens may go negative: later callers queue up behind earlier reservations.
+            self._tokens -= 1
+            return wait
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and lets a single probe through after ``reset_timeout``."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_for = reset_timeout
+        self.last_error = ""
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker allows a probe; 0 when requests may be sent."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + self.open_for - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self.opened_at + self.open_for:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        """Hand back a half-open probe slot that was granted but never used."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, error: str, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = error[:200]
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.open_for = max(self.reset_timeout, retry_after or 0.0)
+
+    def snapshot(self) -> dict:
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "retry_in": round(retry_in, 1),
+                "last_error": self.last_error,
+            }
+
+
+class HostGuard:
+    """Per-host token-bucket rate limits and circuit breakers for outgoing requests.
+
+    Call ``acquire(host)`` before a request and ``record(host, ...)`` after it.
+    Exceptions, 429s and 5xx responses count as failures.
+    """
+
+    def __init__(self, max_wait: float = RATE_LIMIT_MAX_WAIT):
+        self.max_wait = max_wait
+        self._buckets: dict[str, TokenBucket] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str) -> None:
+        """Block until ``host`` may be contacted; raises CircuitOpenError or RateLimitedError."""
+        breaker = self._breaker(host)
+        if not breaker.allow():
+            raise CircuitOpenError(host, breaker.retry_in())
+        wait = self._bucket(host).reserve(self.max_wait)
+        if wait is None:
+            breaker.release_probe()
+            raise RateLimitedError(f"{host}: rate limit wait over {self.max_wait:.0f}s")
+        if wait:
+            time.sleep(wait)
+
+    def record(
+        self,
+        host: str,
+        status_code: Optional[int] = None,
+        error: Optional[Exception] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        breaker = self._breaker(host)
+        if error is not None:
+            breaker.record_failure(f"{type(error).__name__}: {error}")
+        elif status_code == 429 or (status_code is not None and status_code >= 500):
+            breaker.record_failure(f"HTTP {status_code}", retry_after)
+        else:
+            breaker.record_success()
+
+    def abandon(self, host: str) -> None:
+        """Forget a request that ended for reasons unrelated to the host's health."""
+        self._breaker(host).release_probe()
+
+    def is_open(self, host: str) -> bool:
+        """True while ``host``'s breaker is open and not yet due for a probe."""
+        with self._lock:
+            breaker = self._breakers.get(host)
+        return breaker is not None and breaker.retry_in() > 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.snapshot() for host, breaker in sorted(breakers.items())}
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = HOST_RATE_LIMITS.get(host, (RATE_LIMIT_RPS, RATE_LIMIT_BURST))
+                bucket = TokenBucket(rate, burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker()
+                self._breakers[host] = breaker
+            return breaker
+
+
+_guard: Optional[HostGuard] = None
+_guard_lock = threading.Lock()
+
+
+def get_host_guard() -> HostGuard:
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            _guard = HostGuard()
+        return _guard
@@ -1,102 +1,175 @@
+import os
 import uuid
-import re
-from urllib.parse import quote_plus
-from bs4 import BeautifulSoup
+import json
+from concurrent.futures import TimeoutError
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import quote_plus, urlsplit, urlunsplit
 
+from app.core.errors import ScrapingError
 from app.sources.base import ContentSource, ContentItem
+from app.sources.parsing import get_parsing_service, parse_reddit_html
+from app.core.cache import TieredCache
+
+# json: listing endpoints only; html: old.reddit page scraping only;
+# auto: try JSON first and fall back to HTML when it fails.
+FETCH_MODES = ("json", "html", "auto")
+
+ENRICH_COMMENTS = int(os.getenv("REDDIT_ENRICH_COMMENTS", "5"))
+_enrichment_cache = TieredCache("reddit_enrichment", ttl=6 * 60 * 60, max_entries=1024)
 
 
 class RedditSource(ContentSource):
     source_name = "reddit"
+    cache_ttl = 600  # search pages go stale quickly
+    fetch_mode = os.getenv("REDDIT_FETCH_MODE", "auto")
+    candidate_budget = int(os.getenv("REDDIT_CANDIDATE_BUDGET", "50"))
+    max_pages = int(os.getenv("REDDIT_MAX_PAGES", "3"))
+    supports_enrichment = True
+    max_bytes = int(os.getenv("REDDIT_MAX_BYTES", str(4 * 1024 * 1024)))
 
     def scrape(self, url: str, keywords: list[str], time_window: str = "7d") -> list[ContentItem]:
         items = []
 
         if "reddit.com" in url:
             # Convert to old reddit for easier parsing
-            old_url = url.replace("www.reddit.com", "old.reddit.com")
-            items.extend(self._scrape_page(old_url, keywords))
+            page_url = url.replace("www.reddit.com", "old.reddit.com")
         else:
             # Search Reddit
             time_map = {"24h": "day", "7d": "week", "14d": "month", "30d": "month"}
             reddit_time = time_map.get(time_window, "week")
             search_query = quote_plus(" ".join(keywords))
-            search_url = f"https://old.reddit.com/search?q={search_query}&sort=relevance&t={reddit_time}"
-            items.extend(self._scrape_page(search_url, keywords))
+            page_url = f"https://old.reddit.com/search?q={search_query}&sort=relevance&t={reddit_time}"
 
-        return items
+        if self.fetch_mode in ("json", "auto"):
+            json_items = self._scrape_json(page_url)
+            if json_items is not None or self.fetch_mode == "json":
+                return json_items or []
 
-    def _scrape_page(self, url: str, keywords: list[str]) -> list[ContentItem]:
-        html = self._safe_request(url)
-        if not html:
-            return []
-
-        soup = BeautifulSoup(html, "lxml")
-        items = []
-
-        # old.reddit.com uses div.thing for each post
-        posts = soup.select("div.thing.link")
-        if not posts:
-            # Fallback: try other selectors
-            posts = soup.select("[data-fullname]")
+        items.extend(self._scrape_page(page_url, keywords))
+        return items
 
-        for post in posts[:20]:
+    def _scrape_json(self, page_url: str) -> Optional[list[ContentItem]]:
+        """Read posts from the listing's .json endpoint, following ``after`` cursors.
+
+        Returns None when the endpoint cannot be fetched or parsed, so callers
+        can fall back to HTML scraping.
+        """
+        items: list[ContentItem] = []
+        after = None
+        for page in range(self.max_pages):
+            url = self._json_url(page_url, after, self.candidate_budget - len(items))
+            text = self._safe_request(url)
+            if not text:
+                return items if page else None
             try:
-                # Title
-                title_el = post.select_one("a.title, a.search-title")
-                title = title_el.get_text(strip=True) if title_el else ""
-                post_url = title_el.get("href", "") if title_el else ""
-                if post_url and not post_url.startswith("http"):
-                    post_url = f"https://old.reddit.com{post_url}"
-
-                # Author
-                author_el = post.select_one("a.author")
-                author = author_el.get_text(strip=True) if author_el else "[deleted]"
-
-                # Score
-                score_el = post.select_one("div.score.unvoted, span.score.unvoted")
-                score_text = score_el.get_text(strip=True) if score_el else "0"
-                score = self._parse_score(score_text)
-
-                # Comments
-                comments_el = post.select_one("a.comments")
-                comments_text = comments_el.get_text(strip=True) if comments_el else "0"
-                comments_match = re.search(r'(\d+)', comments_text)
-                comments = int(comments_match.group(1)) if comments_match else 0
-
-                # Time
-                time_el = post.select_one("time")
-                published = time_el.get("datetime", "") if time_el else ""
-
-                # Subreddit
-                sub_el = post.select_one("a.subreddit")
-                subreddit = sub_el.get_text(strip=True) if sub_el else ""
-
-                if title:
-                    items.append(ContentItem(
-                        id=str(uuid.uuid4()),
-                        source="reddit",
-                        url=post_url,
-                        title=title,
-                        author=author,
-                        published_at=published,
-                        extracted_text=title,
-                        engagement={"score": score, "comments": comments},
-                        raw_metadata={"subreddit": subreddit},
-                    ))
-            except Exception:
-                continue
+                listing = json.loads(text)
+            except json.JSONDecodeError:
+                return items if page else None
+
+            # A post permalink returns [post listing, comment listing].
+            if isinstance(listing, list):
+                listing = listing[0] if listing else {}
+            data = listing.get("data", {}) if isinstance(listing, dict) else {}
+
+            for child in data.get("children", []):
+                if child.get("kind") == "t3":
+                    item = self._json_item(child.get("data", {}))
+                    if item:
+                        items.append(item)
+            after = data.get("after")
+            if not after or len(items) >= self.candidate_budget:
+                break
+
+        return items[:self.candidate_budget]
 
-        return items
+    @staticmethod
+    def _json_url(page_url: str, after: Optional[str], limit: int) -> str:
+        parts = urlsplit(page_url)
+        path = parts.path.rstrip("/") or ""
+        if not path.endswith(".json"):
+            path += ".json"
+        query = parts.query
+        extra = f"limit={max(1, min(limit, 100))}&raw_json=1" + (f"&after={after}" if after else "")
+        query = f"{query}&{extra}" if query else extra
+        return urlunsplit((parts.scheme, parts.netloc, path, query, ""))
 
     @staticmethod
-    def _parse_score(text: str) -> int:
-        text = text.strip().lower().replace(",", "")
-        if text in ("•", "-", ""):
-            return 0
+    def _json_item(post: dict) -> Optional[ContentItem]:
+        title = post.get("title", "")
+        if not title:
+            return None
+        permalink = f"https://old.reddit.com{post.get('permalink', '')}"
+        created = post.get("created_utc")
+        published = datetime.fromtimestamp(created, tz=timezone.utc).isoformat() if created else ""
+        selftext = (post.get("selftext") or "").strip()
+
+        return ContentItem(
+            id=str(uuid.uuid4()),
+            source="reddit",
+            url=post.get("url") or permalink,
+            title=title,
+            author=post.get("author") or "[deleted]",
+            published_at=published,
+            extracted_text=f"{title}\n\n{selftext[:500]}" if selftext else title,
+            engagement={"score": post.get("score", 0), "comments": post.get("num_comments", 0)},
+            raw_metadata={
+                "subreddit": post.get("subreddit_name_prefixed", ""),
+                "post_id": post.get("id", ""),
+                "permalink": permalink,
+            },
+        )
+
+    def _scrape_page(self, url: str, keywords: list[str]) -> list[ContentItem]:
+        resp = self._fetch(url)
+        if not resp:
+            return []
+
         try:
-            if "k" in text:
-                return int(float(text.replace("k", "")) * 1000)
-            return int(text)
-        except ValueError:
-            return 0
+            parsed = get_parsing_service().parse(parse_reddit_html, resp.content, url, resp.charset)
+        except TimeoutError:
+            raise ScrapingError("timed out parsing page", self.source_name)
+        return [ContentItem(**fields) for fields in parsed]
+
+    def fetch_enrichment(self, item: ContentItem, keywords: list[str]) -> Optional[str]:
+        """Return the post's selftext and top comments, cached by post id."""
+        post_id = item.raw_metadata.get("post_id")
+        permalink = item.raw_metadata.get("permalink")
+        if not post_id or not permalink:
+            return None
+
+        cached = _enrichment_cache.get(post_id)
+        if cached is not None:
+            return cached or None
+
+        url = f"{permalink.split('?')[0].rstrip('/')}.json?sort=top&limit={ENRICH_COMMENTS}&depth=1&raw_json=1"
+        text = self._safe_request(url)
+        if not text:
+            return None
+        try:
+            post_listing, comment_listing = json.loads(text)[:2]
+        except (json.JSONDecodeError, ValueError, TypeError):
+            return None
+
+        posts = post_listing.get("data", {}).get("children", [])
+        selftext = (posts[0].get("data", {}).get("selftext") or "").strip() if posts else ""
+
+        comments = []
+        for child in comment_listing.get("data", {}).get("children", []):
+            data = child.get("data", {})
+            body = (data.get("body") or "").strip()
+            if child.get("kind") != "t1" or data.get("stickied") or not body or body in ("[deleted]", "[removed]"):
+                continue
+            comments.append(f"- {body[:300]}")
+            if len(comments) >= ENRICH_COMMENTS:
+                break
+
+        parts = []
+        # JSON-backed items already carry the start of the selftext
+        if selftext and selftext[:500] not in item.extracted_text:
+            parts.append(selftext[:1500])
+        if comments:
+            parts.append("Top comments:\n" + "\n".join(comments))
+        extra = "\n\n".join(parts)
+        _enrichment_cache.set(post_id, extra)
+        return extra or None
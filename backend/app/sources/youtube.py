@@ -1,14 +1,46 @@
+import os
 import re
+import html as html_lib
 import uuid
-import json
+from typing import Optional
 from urllib.parse import quote_plus
 from bs4 import BeautifulSoup
 
 from app.sources.base import ContentSource, ContentItem
+from app.core.cache import TieredCache
+from app.sources.ytdata import (
+    blob_received,
+    continuation_token,
+    extract_video_renderers,
+    extract_videos_in,
+    find_blob,
+    innertube_config,
+    iter_keyed_objects,
+)
+
+SEARCH_API_URL = "https://www.youtube.com/youtubei/v1/search"
+WINDOW_DAYS = {"24h": 1, "7d": 7, "14d": 14, "30d": 30}
+# Descriptions and captions don't change, so enriched videos are kept for a month.
+VIDEO_CACHE_TTL = float(os.getenv("YOUTUBE_VIDEO_CACHE_TTL", str(30 * 24 * 60 * 60)))
+EXCERPT_CHARS = int(os.getenv("YOUTUBE_EXCERPT_CHARS", "800"))
+_video_cache = TieredCache("youtube_video", ttl=VIDEO_CACHE_TTL, max_entries=256)
+_CAPTION_TEXT = re.compile(r"<text[^>]*>(.*?)</text>", re.DOTALL)
+
+_AGE_UNITS_DAYS = {
+    "second": 1 / 86400, "minute": 1 / 1440, "hour": 1 / 24,
+    "day": 1, "week": 7, "month": 30, "year": 365,
+}
 
 
 class YouTubeSource(ContentSource):
     source_name = "youtube"
+    cache_ttl = 600  # search pages go stale quickly
+    max_items = 20
+    # Total search candidates to collect across continuation pages.
+    candidate_budget = int(os.getenv("YOUTUBE_CANDIDATE_BUDGET", "60"))
+    max_pages = int(os.getenv("YOUTUBE_MAX_PAGES", "5"))
+    supports_enrichment = True
+    max_bytes = int(os.getenv("YOUTUBE_MAX_BYTES", str(6 * 1024 * 1024)))
 
     def scrape(self, url: str, keywords: list[str], time_window: str = "7d") -> list[ContentItem]:
         items = []
@@ -20,31 +52,88 @@ class YouTubeSource(ContentSource):
             # Treat as search keywords
             search_query = quote_plus(" ".join(keywords))
             search_url = f"https://www.youtube.com/results?search_query={search_query}"
-            items.extend(self._scrape_page(search_url, keywords))
+            items.extend(self._scrape_search(search_url, keywords, time_window))
 
         return items
 
+    def _scrape_search(self, url: str, keywords: list[str], time_window: str) -> list[ContentItem]:
+        """Collect search results across continuation pages, up to the candidate budget.
+
+        Each continuation token comes from the previous page, so pages are
+        fetched in sequence; paging stops early once a page holds only videos
+        older than ``time_window``.
+        """
+        # Everything we read (ytcfg, ytInitialData) precedes the end of ytInitialData's script.
+        html = self._safe_request(url, stop=blob_received("ytInitialData"))
+        if not html:
+            return []
+
+        bounds = find_blob(html, "ytInitialData")
+        if bounds is None:
+            return self._fallback_parse(html, keywords)
+
+        seen: set[str] = set()
+        videos = extract_videos_in(html, self.candidate_budget, seen, *bounds)
+        if not videos:
+            return self._fallback_parse(html, keywords)
+
+        token = continuation_token(html, *bounds)
+        config = innertube_config(html)
+        max_age = WINDOW_DAYS.get(time_window)
+        pages = 1
+
+        while token and len(videos) < self.candidate_budget and pages < self.max_pages:
+            text = self._fetch_continuation(token, config)
+            if not text:
+                break
+            page = extract_videos_in(text, self.candidate_budget - len(videos), seen)
+            if not page:
+                break
+            videos.extend(page)
+            pages += 1
+            if max_age is not None and self._all_older_than(page, max_age):
+                break
+            token = continuation_token(text)
+
+        return [self._video_item(video) for video in videos]
+
+    def _fetch_continuation(self, token: str, config: dict) -> Optional[str]:
+        url = SEARCH_API_URL + "?prettyPrint=false"
+        if config.get("INNERTUBE_API_KEY"):
+            url += f"&key={config['INNERTUBE_API_KEY']}"
+        payload = {
+            "context": {
+                "client": {
+                    "clientName": "WEB",
+                    "clientVersion": config.get("INNERTUBE_CLIENT_VERSION", "2.20240101.00.00"),
+                    "hl": "en",
+                },
+            },
+            "continuation": token,
+        }
+        return self._safe_post_json(url, payload)
+
+    @classmethod
+    def _all_older_than(cls, videos: list[dict], max_age_days: float) -> bool:
+        ages = [cls._age_days(v.get("publishedTimeText", {}).get("simpleText", "")) for v in videos]
+        known = [age for age in ages if age is not None]
+        return bool(known) and all(age > max_age_days for age in known)
+
+    @staticmethod
+    def _age_days(text: str) -> Optional[float]:
+        """Approximate age in days of a relative time such as "Streamed 3 weeks ago"."""
+        match = re.search(r"(\d+)\s+(second|minute|hour|day|week|month|year)", text.lower())
+        if not match:
+            return None
+        return int(match.group(1)) * _AGE_UNITS_DAYS[match.group(2)]
+
     def _scrape_page(self, url: str, keywords: list[str]) -> list[ContentItem]:
-        html = self._safe_request(url)
+        html = self._safe_request(url, stop=blob_received("ytInitialData"))
         if not html:
             return []
 
-        items = []
-        # YouTube embeds data in JSON within script tags
-        try:
-            # Extract ytInitialData JSON
-            pattern = r'var ytInitialData\s*=\s*({.*?});</script>'
-            match = re.search(pattern, html, re.DOTALL)
-            if not match:
-                # Try alternate pattern
-                pattern = r'ytInitialData\s*=\s*({.*?});\s*</script>'
-                match = re.search(pattern, html, re.DOTALL)
-
-            if match:
-                data = json.loads(match.group(1))
-                items = self._extract_from_initial_data(data, keywords)
-        except (json.JSONDecodeError, KeyError):
-            pass
+        # YouTube embeds data in JSON within script tags; decode only the video entries
+        items = [self._video_item(video) for video in extract_video_renderers(html, self.max_items)]
 
         # Fallback: basic HTML parsing
         if not items:
@@ -52,57 +141,36 @@ class YouTubeSource(ContentSource):
 
         return items
 
-    def _extract_from_initial_data(self, data: dict, keywords: list[str]) -> list[ContentItem]:
-        items = []
-        try:
-            # Navigate through search results
-            contents = (
-                data.get("contents", {})
-                .get("twoColumnSearchResultsRenderer", {})
-                .get("primaryContents", {})
-                .get("sectionListRenderer", {})
-                .get("contents", [])
-            )
-
-            for section in contents:
-                item_section = section.get("itemSectionRenderer", {}).get("contents", [])
-                for entry in item_section:
-                    video = entry.get("videoRenderer")
-                    if not video:
-                        continue
-
-                    video_id = video.get("videoId", "")
-                    title_runs = video.get("title", {}).get("runs", [])
-                    title = " ".join(r.get("text", "") for r in title_runs)
-
-                    channel_runs = video.get("ownerText", {}).get("runs", [])
-                    author = " ".join(r.get("text", "") for r in channel_runs)
-
-                    view_text = video.get("viewCountText", {}).get("simpleText", "0 views")
-                    views = self._parse_view_count(view_text)
-
-                    published = video.get("publishedTimeText", {}).get("simpleText", "")
-
-                    snippet_runs = video.get("detailedMetadataSnippets", [{}])
-                    snippet_text = ""
-                    if snippet_runs:
-                        snippet_runs_inner = snippet_runs[0].get("snippetText", {}).get("runs", [])
-                        snippet_text = " ".join(r.get("text", "") for r in snippet_runs_inner)
-
-                    items.append(ContentItem(
-                        id=str(uuid.uuid4()),
-                        source="youtube",
-                        url=f"https://www.youtube.com/watch?v={video_id}",
-                        title=title,
-                        author=author,
-                        published_at=published,
-                        extracted_text=snippet_text or title,
-                        engagement={"views": views, "view_text": view_text},
-                        raw_metadata={"video_id": video_id},
-                    ))
-        except Exception:
-            pass
-        return items
+    def _video_item(self, video: dict) -> ContentItem:
+        video_id = video.get("videoId", "")
+        title_runs = video.get("title", {}).get("runs", [])
+        title = " ".join(r.get("text", "") for r in title_runs)
+
+        channel_runs = video.get("ownerText", {}).get("runs", [])
+        author = " ".join(r.get("text", "") for r in channel_runs)
+
+        view_text = video.get("viewCountText", {}).get("simpleText", "0 views")
+        views = self._parse_view_count(view_text)
+
+        published = video.get("publishedTimeText", {}).get("simpleText", "")
+
+        snippet_runs = video.get("detailedMetadataSnippets", [{}])
+        snippet_text = ""
+        if snippet_runs:
+            snippet_runs_inner = snippet_runs[0].get("snippetText", {}).get("runs", [])
+            snippet_text = " ".join(r.get("text", "") for r in snippet_runs_inner)
+
+        return ContentItem(
+            id=str(uuid.uuid4()),
+            source="youtube",
+            url=f"https://www.youtube.com/watch?v={video_id}",
+            title=title,
+            author=author,
+            published_at=published,
+            extracted_text=snippet_text or title,
+            engagement={"views": views, "view_text": view_text},
+            raw_metadata={"video_id": video_id},
+        )
 
     def _fallback_parse(self, html: str, keywords: list[str]) -> list[ContentItem]:
         """Fallback parsing using regex patterns for video data in page source."""
@@ -135,6 +203,80 @@ class YouTubeSource(ContentSource):
 
         return items
 
+    def fetch_enrichment(self, item: ContentItem, keywords: list[str]) -> Optional[str]:
+        """Return the video's description and a keyword-relevant transcript excerpt."""
+        video_id = item.raw_metadata.get("video_id")
+        if not video_id:
+            return None
+
+        details = _video_cache.get(video_id)
+        if details is None:
+            details = self._fetch_video_details(video_id)
+            if details is None:
+                return None
+            _video_cache.set(video_id, details)
+
+        parts = []
+        description = details.get("description", "").strip()
+        if description:
+            parts.append(f"Description: {description[:400]}")
+        excerpt = self._relevant_excerpt(details.get("transcript", ""), keywords, EXCERPT_CHARS)
+        if excerpt:
+            parts.append(f"Transcript excerpt: {excerpt}")
+        return "\n\n".join(parts) or None
+
+    def _fetch_video_details(self, video_id: str) -> Optional[dict]:
+        # The watch page is only read once per video, so keep it out of the response cache.
+        page = self._safe_request(
+            f"https://www.youtube.com/watch?v={video_id}", cache_ttl=0, stop=blob_received("ytInitialPlayerResponse"),
+        )
+        if not page:
+            return None
+        bounds = find_blob(page, "ytInitialPlayerResponse")
+        if bounds is None:
+            return None
+
+        description = ""
+        for details in iter_keyed_objects(page, "videoDetails", *bounds):
+            description = details.get("shortDescription", "")
+            break
+
+        transcript = ""
+        for captions in iter_keyed_objects(page, "playerCaptionsTracklistRenderer", *bounds):
+            tracks = captions.get("captionTracks", [])
+            track = next((t for t in tracks if t.get("languageCode", "").startswith("en")), tracks[0] if tracks else None)
+            if track and track.get("baseUrl"):
+                xml = self._safe_request(track["baseUrl"], cache_ttl=0)
+                if xml:
+                    lines = (html_lib.unescape(html_lib.unescape(m)) for m in _CAPTION_TEXT.findall(xml))
+                    transcript = " ".join(line.replace("\n", " ").strip() for line in lines)[:20000]
+            break
+
+        return {"description": description, "transcript": transcript}
+
+    @staticmethod
+    def _relevant_excerpt(transcript: str, keywords: list[str], max_chars: int) -> str:
+        """Pick the transcript windows with the most keyword hits, kept in spoken order."""
+        words = transcript.split()
+        if not words:
+            return ""
+        window = 40
+        chunks = [" ".join(words[i:i + window]) for i in range(0, len(words), window)]
+        terms = [kw.lower() for kw in keywords if kw]
+        hits = [sum(chunk.lower().count(t) for t in terms) for chunk in chunks]
+        by_relevance = sorted(range(len(chunks)), key=lambda i: (-hits[i], i))
+        if hits[by_relevance[0]]:
+            # Only keep windows that mention a keyword; otherwise fall back to the opening.
+            by_relevance = [i for i in by_relevance if hits[i]]
+
+        chosen, used = [], 0
+        for i in by_relevance:
+            if used + len(chunks[i]) > max_chars and chosen:
+                break
+            chosen.append(i)
+            used += len(chunks[i]) + 3
+        return " … ".join(chunks[i][:max_chars] for i in sorted(chosen))
+
     @staticmethod
     def _parse_view_count(text: str) -> int:
         text = text.lower().replace(",", "").replace(" views", "").replace(" view", "").strip()
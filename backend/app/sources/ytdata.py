@@ -0,0 +1,147 @@
+# YouTube inlines multi-megabyte JSON blobs (ytInitialData, ytInitialPlayerResponse).
+# These helpers locate a blob with plain string searches and decode only the small
+# objects we need, instead of regex-matching and json.loads-ing the whole thing.
+import json
+import re
+from typing import Callable, Iterator, Optional
+
+# A JSON string literal (escapes included) or a single brace. Skipping whole
+# strings at C speed means braces inside titles never confuse the depth count.
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}]')
+
+
+def find_blob(text: str, marker: str) -> Optional[tuple[int, int]]:
+    """Return (start, end) bounds of the JSON object assigned after ``marker``.
+
+    ``end`` is the closing ``</script>``; YouTube escapes ``<`` inside its JSON,
+    so the first one after the object start bounds the blob.
+    """
+    pos = text.find(marker)
+    if pos == -1:
+        return None
+    start = text.find("{", pos + len(marker))
+    if start == -1:
+        return None
+    end = text.find("</script>", start)
+    return start, (end if end != -1 else len(text))
+
+
+def blob_received(marker: str) -> Callable[[bytearray], bool]:
+    """Return a download ``stop`` check that fires once the blob after ``marker`` has fully arrived.
+
+    The check remembers how far it has searched, so each call only scans newly received bytes.
+    """
+    needle = marker.encode()
+    closing = b"</script>"
+    scanned = 0
+    blob_start = -1
+
+    def received(body: bytearray) -> bool:
+        nonlocal scanned, blob_start
+        if blob_start == -1:
+            blob_start = body.find(needle, max(0, scanned - len(needle)))
+            if blob_start == -1:
+                scanned = len(body)
+                return False
+            scanned = blob_start
+        found = body.find(closing, max(blob_start, scanned - len(closing)))
+        scanned = len(body)
+        return found != -1
+
+    return received
+
+
+def object_end(text: str, start: int, limit: Optional[int] = None) -> Optional[int]:
+    """Return the index just past the balanced object opening at ``text[start]``."""
+    depth = 0
+    for match in _TOKEN.finditer(text, start, limit if limit is not None else len(text)):
+        token = match.group()
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return None
+
+
+def decode_object(text: str, start: int, limit: Optional[int] = None) -> Optional[dict]:
+    end = object_end(text, start, limit)
+    if end is None:
+        return None
+    try:
+        return json.loads(text[start:end])
+    except json.JSONDecodeError:
+        return None
+
+
+def iter_keyed_objects(text: str, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[dict]:
+    """Yield each object stored under ``"key":`` within text[start:end], in document order."""
+    end = len(text) if end is None else end
+    needle = f'"{key}":'
+    pos = text.find(needle, start, end)
+    while pos != -1:
+        obj_start = pos + len(needle)
+        while obj_start < end and text[obj_start] in " \t\r\n":
+            obj_start += 1
+        if obj_start < end and text[obj_start] == "{":
+            obj_end = object_end(text, obj_start, end)
+            if obj_end is None:
+                return
+            try:
+                yield json.loads(text[obj_start:obj_end])
+            except json.JSONDecodeError:
+                pass
+            pos = text.find(needle, obj_end, end)
+        else:
+            pos = text.find(needle, obj_start, end)
+
+
+def extract_video_renderers(html: str, limit: int = 20, seen: Optional[set[str]] = None) -> list[dict]:
+    """Return up to ``limit`` distinct ``videoRenderer`` objects from a page's ytInitialData.
+
+    Pass the same ``seen`` set across pages to skip videos already collected.
+    """
+    bounds = find_blob(html, "ytInitialData")
+    if bounds is None:
+        return []
+    return extract_videos_in(html, limit, seen, *bounds)
+
+
+def extract_videos_in(
+    text: str,
+    limit: int,
+    seen: Optional[set[str]] = None,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> list[dict]:
+    """Return up to ``limit`` ``videoRenderer`` objects from raw JSON text whose ids are not in ``seen``."""
+    seen = set() if seen is None else seen
+    videos: list[dict] = []
+    if limit <= 0:
+        return videos
+    for video in iter_keyed_objects(text, "videoRenderer", start, end):
+        video_id = video.get("videoId", "")
+        if not video_id or video_id in seen:
+            continue
+        seen.add(video_id)
+        videos.append(video)
+        if len(videos) >= limit:
+            break
+    return videos
+
+
+def continuation_token(text: str, start: int = 0, end: Optional[int] = None) -> Optional[str]:
+    """Return the token of the last search continuation in text[start:end], if any."""
+    token = None
+    for command in iter_keyed_objects(text, "continuationCommand", start, end):
+        token = command.get("token") or token
+    return token
+
+
+_CONFIG_VALUE = re.compile(r'"(INNERTUBE_API_KEY|INNERTUBE_CLIENT_VERSION)"\s*:\s*"([^"]+)"')
+
+
+def innertube_config(html: str) -> dict:
+    """Return the INNERTUBE_API_KEY / INNERTUBE_CLIENT_VERSION values a page was served with."""
+    return {key: value for key, value in _CONFIG_VALUE.findall(html)}
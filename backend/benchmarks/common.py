@@ -0,0 +1,57 @@
+import argparse
+import gc
+import glob
+import os
+import time
+import tracemalloc
+from typing import Callable
+
+
+def arg_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("pages", nargs="*", help="saved pages or directories of them; synthetic fixtures when omitted")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case; the best one is reported")
+    return parser
+
+
+def saved_pages(paths: list[str]) -> list[tuple[str, bytes]]:
+    """(name, body) for every file given, expanding directories to the files inside them."""
+    files: list[str] = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*"))) if os.path.isdir(path) else [path])
+    pages = []
+    for file in files:
+        if os.path.isfile(file):
+            with open(file, "rb") as f:
+                pages.append((os.path.basename(file), f.read()))
+    return pages
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+    """Fastest of ``repeat`` runs of ``fn``, in seconds."""
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    """Peak bytes allocated by Python while ``fn`` runs."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def report(rows: list[tuple[str, float, float]], columns: tuple[str, str] = ("baseline", "current")) -> None:
+    """Print (case, baseline seconds, current seconds) rows with the speedup of each."""
+    width = max(len(name) for name, _, _ in rows)
+    print(f"{'case':<{width}}  {columns[0]:>10}  {columns[1]:>10}  {'speedup':>8}")
+    for name, baseline, current in rows:
+        print(f"{name:<{width}}  {baseline * 1000:>8.2f}ms  {current * 1000:>8.2f}ms  {baseline / current:>7.1f}x")
@@ -0,0 +1,81 @@
+import random
+
+from bs4 import BeautifulSoup
+
+from app.sources.parsing import parse_generic_html
+from benchmarks.common import arg_parser, best_time, report, saved_pages
+
+# Run from backend/: python -m benchmarks.generic_parsing [saved pages or directories...]
+
+
+def baseline_parse(content: bytes, url: str) -> dict:
+    """The extraction this replaced: a full BeautifulSoup tree, every link materialized."""
+    soup = BeautifulSoup(content, "lxml")
+    for tag in soup(["script", "style", "nav", "footer", "header"]):
+        tag.decompose()
+    title = soup.title.get_text(strip=True) if soup.title else url
+    headings = [text for h in soup.find_all(["h1", "h2", "h3"]) if (text := h.get_text(strip=True))]
+    paragraphs = [text for p in soup.find_all("p") if len(text := p.get_text(strip=True)) > 30]
+    links = [
+        {"text": text, "href": a.get("href", "")}
+        for a in soup.find_all("a", href=True) if len(text := a.get_text(strip=True)) > 10
+    ]
+    extracted_text = "\n\n".join([f"# {title}"] + [f"## {h}" for h in headings[:10]] + paragraphs[:20])
+    return {"title": title, "extracted_text": extracted_text[:3000], "headings": headings[:10], "link_count": len(links)}
+
+
+def synthetic_article(sections: int, seed: int = 0) -> bytes:
+    """A news-style page: heavy head scripts, navigation, the article, then comments and related links."""
+    rng = random.Random(seed)
+    words = [f"word{i}" for i in range(3000)]
+
+    def text(n: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(n))
+
+    nav = "".join(f'<li><a href="/section/{i}">{text(3)}</a></li>' for i in range(80))
+    body = []
+    for i in range(sections):
+        body.append(f"<h2>{text(6)}</h2>")
+        body.extend(f"<p>{text(40)} <a href='/p/{i}-{j}'>{text(4)}</a> {text(20)}</p>" for j in range(6))
+    comments = "".join(
+        f'<div class="comment"><p>{text(30)}</p><a href="/u/{i}">{text(3)}</a></div>' for i in range(sections * 10)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>" + text(8) + "</title>"
+        + "".join(f"<script>var x{i} = '{text(300)}';</script>" for i in range(20))
+        + "<style>" + text(2000) + "</style></head><body>"
+        + f"<header><nav><ul>{nav}</ul></nav></header><article><h1>{text(10)}</h1>{''.join(body)}</article>"
+        + f"<section class='comments'>{comments}</section><footer>{nav}</footer></body></html>"
+    ).encode()
+
+
+def main() -> None:
+    parser = arg_parser("Generic page extraction: full BeautifulSoup parse vs. the streaming lxml extractor.")
+    args = parser.parse_args()
+
+    pages = saved_pages(args.pages)
+    if not pages:
+        pages = [(f"synthetic-{n}-sections", synthetic_article(n, seed=n)) for n in (5, 50, 400)]
+
+    rows = []
+    for name, content in pages:
+        url = f"https://example.com/{name}"
+        expected = baseline_parse(content, url)
+        got = parse_generic_html(content, url)[0]
+        # Links are only counted over the part of the page the streaming extractor read.
+        for field in ("title", "extracted_text"):
+            if got[field] != expected[field]:
+                print(f"{name}: {field} differs")
+        if got["raw_metadata"]["headings"] != expected["headings"]:
+            print(f"{name}: headings differ")
+        print(f"{name}: {len(content) / 1e6:.2f}MB")
+        rows.append((
+            name,
+            best_time(lambda: baseline_parse(content, url), args.repeat),
+            best_time(lambda: parse_generic_html(content, url), args.repeat),
+        ))
+    report(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import random
+
+from app.core.ranking import TopKRanker, rank_items
+from app.sources.base import ContentItem
+from benchmarks.common import best_time, report
+
+# Run from backend/: python -m benchmarks.ranking_relevance
+
+
+def synthetic_items(count: int, tokens: int, seed: int = 0) -> list[ContentItem]:
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(5000)] + ["ai", "said", "tools", "agents", "open", "source"] * 50
+    return [
+        ContentItem(
+            id=str(i),
+            source=rng.choice(["youtube", "reddit", "generic"]),
+            title=" ".join(rng.choice(vocabulary) for _ in range(12)),
+            extracted_text=" ".join(rng.choice(vocabulary) for _ in range(tokens)),
+            published_at=f"{rng.randint(1, 30)} days ago",
+            engagement={"views": rng.randint(0, 2_000_000), "score": rng.randint(0, 6000), "comments": rng.randint(0, 500)},
+        )
+        for i in range(count)
+    ]
+
+
+def streamed(items: list[ContentItem], keywords: list[str], k: int, relevance: str, batches: int) -> list[ContentItem]:
+    ranker = TopKRanker(keywords, k, relevance=relevance)
+    size = -(-len(items) // batches)
+    for order, start in enumerate(range(0, len(items), size)):
+        ranker.add(items[start:start + size], order=order)
+    return ranker.results()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Keyword relevance cost: the default substring scorer vs. BM25.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case; the best one is reported")
+    parser.add_argument("--k", type=int, default=20, help="items kept")
+    args = parser.parse_args()
+
+    keywords = ["ai", "ai tools", "open source", "agents", "term42", "term7 term8"]
+    rows = []
+    for count, tokens in ((200, 100), (2000, 200), (5000, 400)):
+        items = synthetic_items(count, tokens, seed=count)
+        name = f"{count} items x {tokens} tokens"
+        rows.append((
+            f"{name}, all at once",
+            best_time(lambda: rank_items(items, keywords, args.k, relevance="substring"), args.repeat),
+            best_time(lambda: rank_items(items, keywords, args.k, relevance="bm25"), args.repeat),
+        ))
+        rows.append((
+            f"{name}, 8 batches",
+            best_time(lambda: streamed(items, keywords, args.k, "substring", 8), args.repeat),
+            best_time(lambda: streamed(items, keywords, args.k, "bm25", 8), args.repeat),
+        ))
+        substring = {item.id for item in rank_items(items, keywords, args.k, relevance="substring")}
+        bm25 = {item.id for item in rank_items(items, keywords, args.k, relevance="bm25")}
+        print(f"{name}: {len(substring & bm25)} of the top {args.k} are the same under both scorers")
+    # A speedup below 1 is what BM25 costs on top of the substring scorer.
+    report(rows, columns=("substring", "bm25"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import random
+import re
+
+from app.sources.ytdata import extract_video_renderers
+from benchmarks.common import arg_parser, best_time, peak_memory, report, saved_pages
+
+# Run from backend/: python -m benchmarks.youtube_extraction [saved search pages...]
+
+
+def baseline_videos(html: str) -> list[dict]:
+    """The extraction this replaced: regex out the whole ytInitialData blob, json.loads it, walk to the videos."""
+    match = re.search(r'var ytInitialData\s*=\s*({.*?});</script>', html, re.DOTALL)
+    if not match:
+        match = re.search(r'ytInitialData\s*=\s*({.*?});\s*</script>', html, re.DOTALL)
+    if not match:
+        return []
+    data = json.loads(match.group(1))
+    sections = (
+        data.get("contents", {})
+        .get("twoColumnSearchResultsRenderer", {})
+        .get("primaryContents", {})
+        .get("sectionListRenderer", {})
+        .get("contents", [])
+    )
+    return [
+        entry["videoRenderer"]
+        for section in sections
+        for entry in section.get("itemSectionRenderer", {}).get("contents", [])
+        if entry.get("videoRenderer")
+    ]
+
+
+def synthetic_search_page(videos: int = 120, seed: int = 0) -> str:
+    """A results page shaped like YouTube's: inline scripts, a ytInitialData blob with
+    heavy video renderers between shelves, and a large trailing framework payload."""
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(2000)] + ["{braces}", 'say "hi"', "</b>", "ünïcode"]
+
+    def text(n: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(n))
+
+    def renderer(i: int) -> dict:
+        video_id = f"{i:011d}"
+        return {"videoRenderer": {
+            "videoId": video_id,
+            "thumbnail": {"thumbnails": [
+                {"url": f"https://i.ytimg.com/vi/{video_id}/hq{size}.jpg?sqp={text(8)}", "width": size, "height": size}
+                for size in (120, 320, 480, 720)
+            ]},
+            "title": {"runs": [{"text": text(10)}]},
+            "ownerText": {"runs": [{"text": text(2), "navigationEndpoint": {"browseEndpoint": {"browseId": text(1)}}}]},
+            "publishedTimeText": {"simpleText": f"{rng.randint(1, 30)} days ago"},
+            "viewCountText": {"simpleText": f"{rng.randint(100, 9_000_000):,} views"},
+            "detailedMetadataSnippets": [{"snippetText": {"runs": [{"text": text(30)}]}}],
+            "badges": [{"metadataBadgeRenderer": {"label": text(2), "trackingParams": text(20)}}],
+            "trackingParams": text(40),
+            "menu": {"menuRenderer": {"items": [{"menuServiceItemRenderer": {"text": {"runs": [{"text": text(3)}]}, "trackingParams": text(20)}} for _ in range(4)]}},
+        }}
+
+    contents = []
+    for i in range(videos):
+        contents.append(renderer(i))
+        if i % 10 == 9:
+            contents.append({"shelfRenderer": {"title": {"simpleText": text(4)}, "content": {"verticalListRenderer": {
+                "items": [{"reelItemRenderer": {"videoId": text(1), "headline": {"simpleText": text(8)}}} for _ in range(6)],
+            }}}})
+    data = {
+        "responseContext": {"serviceTrackingParams": [{"params": [{"key": text(1), "value": text(5)} for _ in range(30)]}]},
+        "contents": {"twoColumnSearchResultsRenderer": {"primaryContents": {"sectionListRenderer": {"contents": [
+            {"itemSectionRenderer": {"contents": contents}},
+            {"continuationItemRenderer": {"continuationEndpoint": {"continuationCommand": {"token": text(12)}}}},
+        ]}}}},
+        "frameworkUpdates": {"entityBatchUpdate": {"mutations": [
+            {"entityKey": text(1), "payload": {"macroMarkersListEntity": {"markers": text(60)}}} for _ in range(1500)
+        ]}},
+    }
+    # YouTube escapes "<" inside its inline JSON, which is what lets </script> bound the blob.
+    blob = json.dumps(data).replace("<", "\\u003c")
+    scripts = "".join(f"<script>var s{i} = {json.dumps(text(400))};</script>" for i in range(40))
+    return (
+        "<!DOCTYPE html><html><head><title>results - YouTube</title>"
+        f'{scripts}<script>ytcfg.set({{"INNERTUBE_API_KEY":"key","INNERTUBE_CLIENT_VERSION":"2.0"}});</script>'
+        f"</head><body><script>var ytInitialData = {blob};</script>"
+        f"<script>{text(5000)}</script></body></html>"
+    )
+
+
+def main() -> None:
+    parser = arg_parser("ytInitialData extraction: regex + json.loads of the whole blob vs. the targeted scanner.")
+    parser.add_argument("--limit", type=int, default=20, help="videos the current extractor stops at")
+    args = parser.parse_args()
+
+    pages = [(name, body.decode("utf-8", "replace")) for name, body in saved_pages(args.pages)]
+    if not pages:
+        pages = [(f"synthetic-{n}", synthetic_search_page(n, seed=n)) for n in (20, 120)]
+
+    rows = []
+    for name, html in pages:
+        expected = [video["videoId"] for video in baseline_videos(html)]
+        got = [video["videoId"] for video in extract_video_renderers(html, limit=len(expected) or args.limit)]
+        if got != expected:
+            print(f"{name}: extractors disagree ({len(got)} vs {len(expected)} videos)")
+
+        print(f"{name}: {len(html) / 1e6:.2f}MB, {len(expected)} videos, peak memory "
+              f"{peak_memory(lambda: baseline_videos(html)) / 1e6:.1f}MB baseline, "
+              f"{peak_memory(lambda: extract_video_renderers(html, args.limit)) / 1e6:.1f}MB current")
+        baseline = best_time(lambda: baseline_videos(html), args.repeat)
+        rows.append((f"{name} first {args.limit}", baseline, best_time(lambda: extract_video_renderers(html, args.limit), args.repeat)))
+        rows.append((f"{name} all", baseline, best_time(lambda: extract_video_renderers(html, len(expected)), args.repeat)))
+    report(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import pytest
+
+from app.sources.cache import ResponseCache
+from app.sources.http import HttpClient
+
+BODY = b"<html>" + b"x" * 5000 + b"<marker>" + b"y" * 300_000 + b"</html>"
+
+
+@pytest.fixture
+def client():
+    client = HttpClient(http2=False)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "http_cache.sqlite3"))
+
+
+def _page(http_server) -> str:
+    http_server.routes["/page"] = (200, "text/html", BODY)
+    return f"{http_server.base_url}/page"
+
+
+def test_capped_body_is_not_served_to_a_caller_with_a_larger_cap(http_server, client, cache):
+    url = _page(http_server)
+    small = cache.fetch(client, url, ttl=60, max_bytes=1000)
+    assert small.truncated and len(small.content) == 1000
+
+    # Same or smaller caps can reuse the stored prefix.
+    assert cache.fetch(client, url, ttl=60, max_bytes=500).content == BODY[:500]
+    assert cache.stats()["hits"] == 1
+
+    full = cache.fetch(client, url, ttl=60)
+    assert full.content == BODY and not full.truncated
+    assert cache.fetch(client, url, ttl=60).content == BODY
+    assert cache.stats()["hits"] == 2
+
+
+def test_stopped_body_is_only_served_when_the_stop_check_is_met(http_server, client, cache):
+    url = _page(http_server)
+    early = cache.fetch(client, url, ttl=60, stop=lambda body: b"<marker>" in body)
+    assert early.truncated
+
+    again = cache.fetch(client, url, ttl=60, stop=lambda body: b"<marker>" in body)
+    assert again.content == early.content and again.truncated
+    assert cache.stats()["hits"] == 1
+
+    # A caller needing the end of the page must not get the partial body.
+    later = cache.fetch(client, url, ttl=60, stop=lambda body: b"</html>" in body)
+    assert later.content.endswith(b"</html>")
+    assert cache.stats()["hits"] == 1
+
+
+def test_full_body_is_cut_to_a_smaller_cap(http_server, client, cache):
+    url = _page(http_server)
+    cache.fetch(client, url, ttl=60)
+    capped = cache.fetch(client, url, ttl=60, max_bytes=100)
+    assert capped.content == BODY[:100] and capped.truncated
@@ -0,0 +1,43 @@
+import pytest
+
+from app.core import pipeline
+from app.core.corpus import ContentCorpus
+from app.sources.base import ContentItem
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    return ContentCorpus(str(tmp_path / "corpus.sqlite3"))
+
+
+def _items(word: str, count: int) -> list[ContentItem]:
+    return [
+        ContentItem(
+            id=f"{word}{i}", source="reddit", url=f"https://old.reddit.com/r/x/{word}{i}",
+            title=f"{word} thread {i}", extracted_text=f"all about {word}", published_at="2 hours ago",
+            raw_metadata={"post_id": f"{word}{i}"},
+        )
+        for i in range(count)
+    ]
+
+
+def _search_task(keywords: list[str]) -> dict:
+    return {"source": "reddit", "url": "", "keywords": keywords, "time_window": "7d"}
+
+
+def test_keyword_counts_count_each_keyword_on_its_own(corpus):
+    corpus.upsert(_items("python", 20) + _items("rust", 2))
+    assert corpus.keyword_counts("reddit", ["python", "rust", "python", " "]) == {"python": 20, "rust": 2}
+    assert corpus.keyword_counts("youtube", ["python"]) == {"python": 0}
+
+
+def test_one_well_covered_keyword_does_not_answer_for_the_rest(corpus, monkeypatch):
+    monkeypatch.setattr(pipeline, "CORPUS_MIN_ITEMS", 15)
+    monkeypatch.setattr(pipeline, "CORPUS_MIN_PER_KEYWORD", 3)
+    corpus.upsert(_items("python", 20) + _items("rust", 2))
+    # Twenty-two items match the OR search, but only two of them are about "rust".
+    assert pipeline._answer_from_corpus(corpus, _search_task(["python", "rust"])) is None
+    assert len(pipeline._answer_from_corpus(corpus, _search_task(["python"]))) == 20
+
+    corpus.upsert(_items("rust", 3))
+    assert len(pipeline._answer_from_corpus(corpus, _search_task(["python", "rust"]))) == 23
@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from app.core.dedup import Deduplicator, canonical_url, simhash
+from app.core.ranking import TopKRanker, _compute_score, rank_items, score_items
+from app.sources.base import ContentItem
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.youtube.com/watch?v=abcdefghijk&feature=share&t=10", "youtube.com/watch?v=abcdefghijk"),
+    ("https://youtu.be/abcdefghijk?si=xyz", "youtube.com/watch?v=abcdefghijk"),
+    ("https://m.youtube.com/shorts/abcdefghijk/", "youtube.com/watch?v=abcdefghijk"),
+    ("http://old.reddit.com/r/python/comments/abc/title/", "reddit.com/r/python/comments/abc/title"),
+    ("https://Example.com:443/a/?utm_source=x&b=2&a=1#frag", "example.com/a?a=1&b=2"),
+    ("https://user@example.com/page?fbclid=1", "example.com/page"),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 3, 7])
+def test_signatures_within_max_distance_share_a_band(max_distance):
+    rng = random.Random(max_distance)
+    dedup = Deduplicator(max_distance)
+    for _ in range(500):
+        signature = rng.getrandbits(64)
+        other = signature
+        for bit in rng.sample(range(64), rng.randint(0, max_distance)):
+            other ^= 1 << bit
+        assert set(dedup._band_values(signature)) & set(dedup._band_values(other))
+        # The bands partition all 64 bits.
+        assert sum(value << (64 // dedup.bands * band) for band, value in dedup._band_values(signature)) == signature
+
+
+def _text(rng: random.Random, n: int = 40) -> str:
+    return " ".join(f"word{rng.randint(0, 5000)}" for _ in range(n))
+
+
+def test_near_duplicates_merge_and_distinct_texts_do_not():
+    rng = random.Random(0)
+    base = _text(rng)
+    items = [
+        ContentItem(id="a", source="generic", url="https://a.test/1", title="story", extracted_text=base),
+        ContentItem(id="b", source="generic", url="https://b.test/2", title="story", extracted_text=base + " !"),
+        ContentItem(id="c", source="generic", url="https://c.test/3", title="other", extracted_text=_text(rng)),
+        ContentItem(id="d", source="generic", url="https://d.test/4", title="tiny", extracted_text=""),
+    ]
+    assert simhash(items[0].extracted_text) == simhash(items[1].extracted_text)
+    assert simhash("too short") is None
+    fresh, updated = Deduplicator().add(items)
+    assert [item.id for item in fresh] == ["a", "c", "d"]
+    assert fresh[0].raw_metadata["duplicates"] == [{"source": "generic", "url": "https://b.test/2", "engagement": {}}]
+
+
+def _video(views: int) -> ContentItem:
+    return ContentItem(
+        id="yt", source="youtube", url="https://www.youtube.com/watch?v=abcdefghijk", title="big launch video",
+        published_at="1 day ago", engagement={"views": views}, raw_metadata={"video_id": "abcdefghijk"},
+    )
+
+
+def _reddit_link(score: int) -> ContentItem:
+    return ContentItem(
+        id="rd", source="reddit", url="https://youtu.be/abcdefghijk", title="big launch video",
+        published_at="1 day ago", engagement={"score": score, "comments": 1}, raw_metadata={"post_id": "p1"},
+    )
+
+
+@pytest.mark.parametrize("relevance", ["substring", "bm25"])
+@pytest.mark.parametrize("reddit_first", [False, True])
+def test_best_copy_survives_whichever_source_finishes_first(reddit_first, relevance):
+    batches = [(0, [_video(2_000_000)]), (1, [_reddit_link(3)])]
+    if reddit_first:
+        batches.reverse()
+    dedup = Deduplicator()
+    ranker = TopKRanker(["launch"], 5, relevance=relevance)
+    for order, batch in batches:
+        fresh, updated = dedup.add(batch, order=order)
+        ranker.update(updated)
+        ranker.add(fresh, order=order)
+
+    [story] = ranker.results()
+    assert (story.source, story.engagement) == ("youtube", {"views": 2_000_000})
+    assert story.raw_metadata["video_id"] == "abcdefghijk"
+    assert story.raw_metadata["duplicates"] == [
+        {"source": "reddit", "url": "https://youtu.be/abcdefghijk", "engagement": {"score": 3, "comments": 1}},
+    ]
+    # Deduplication never ranks a story below its best copy on its own.
+    [alone] = rank_items([_video(2_000_000)], ["launch"], 5, relevance=relevance)
+    assert story.relevance_score == alone.relevance_score
+    assert dedup.merged == 1
+
+
+def test_equally_engaging_copies_resolve_to_the_lower_batch_order():
+    later = ContentItem(id="x", source="reddit", url="https://reddit.com/r/a/1", raw_metadata={"post_id": "p1"})
+    earlier = ContentItem(id="y", source="reddit", url="https://reddit.com/r/b/1", raw_metadata={"post_id": "p1"})
+    dedup = Deduplicator()
+    dedup.add([later], order=1)
+    fresh, updated = dedup.add([earlier], order=0)
+    assert fresh == []
+    assert [(item.id, item.url) for item in updated] == [("x", "https://reddit.com/r/b/1")]
+
+
+def test_cluster_engagement_takes_the_best_copy_in_batch_and_reference_scoring():
+    item = _reddit_link(3)
+    item.raw_metadata["duplicates"] = [
+        {"source": "youtube", "url": "u", "engagement": {"views": 2_000_000}},
+        {"source": "generic", "url": "g"},  # entries saved before engagement was recorded
+    ]
+    plain = _reddit_link(3)
+    scores = score_items([item, plain], ["launch"])
+    assert scores.tolist() == [round(_compute_score(item, ["launch"]), 4), round(_compute_score(plain, ["launch"]), 4)]
+    assert scores[0] > scores[1]
@@ -0,0 +1,105 @@
+import threading
+import time
+
+from app.core import executor as executor_module
+from app.core.deadline import Deadline
+from app.core.executor import ScrapeExecutor
+from app.sources.base import ContentItem
+from app.sources.ratelimit import BREAKER_FAILURES, HostGuard
+
+
+class _SlowSource:
+    """Scrapes take ``delay`` seconds; records how many run at once, overall and per host."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self.peak_total = 0
+
+    def scrape(self, url: str, keywords: list[str], time_window: str = "7d") -> list[ContentItem]:
+        host = url.split("/")[2]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+            self.peak_total = max(self.peak_total, sum(self.active.values()))
+        time.sleep(self.delay if host == "slow.test" else 0.01)
+        with self.lock:
+            self.active[host] -= 1
+        return [ContentItem(id=url, source="generic", url=url, title=url)]
+
+
+def _task(url: str) -> dict:
+    return {"source": "generic", "url": url, "keywords": [], "time_window": "7d"}
+
+
+def test_tasks_waiting_for_a_busy_host_do_not_hold_global_slots():
+    source = _SlowSource(delay=0.5)
+    executor = ScrapeExecutor(max_concurrency=2, per_host_concurrency=1)
+    plan = [_task(f"http://slow.test/{i}") for i in range(3)] + [_task("http://fast.test/0")]
+
+    started = time.monotonic()
+    finished = []
+    for outcome in executor.stream(plan, {"generic": source}):
+        assert outcome.error is None
+        finished.append((outcome.task["url"], time.monotonic() - started))
+
+    # The fast host's task ran alongside the first slow one instead of queueing behind the other two.
+    assert finished[0][0] == "http://fast.test/0" and finished[0][1] < 0.4
+    assert [url for url, _ in finished[1:]] == [f"http://slow.test/{i}" for i in range(3)]
+    assert source.peak == {"slow.test": 1, "fast.test": 1}
+    assert source.peak_total <= 2
+
+
+def test_tasks_still_waiting_for_their_host_are_cut_off_at_the_deadline():
+    source = _SlowSource(delay=0.3)
+    executor = ScrapeExecutor(max_concurrency=4, per_host_concurrency=1)
+    plan = [_task(f"http://slow.test/{i}") for i in range(3)]
+
+    outcomes = list(executor.stream(plan, {"generic": source}, Deadline(0.45)))
+    assert [(o.index, o.cut_off) for o in outcomes] == [(0, False), (1, True), (2, True)]
+    # The running task frees its host slot when it finishes, and the queued one is never started.
+    time.sleep(0.4)
+    assert executor._host_active == {}
+    assert source.peak == {"slow.test": 1}
+
+
+def test_run_calls_shares_the_host_limit():
+    executor = ScrapeExecutor(max_concurrency=4, per_host_concurrency=1)
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def call(value):
+        def run():
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            if value == 2:
+                raise RuntimeError("boom")
+            return value
+        return run
+
+    results = executor.run_calls([("api.test", call(i)) for i in range(4)])
+    assert results == [0, 1, None, 3]
+    assert active[1] == 1
+
+
+def test_tasks_and_calls_for_a_host_with_an_open_circuit_are_skipped(monkeypatch):
+    guard = HostGuard()
+    for _ in range(BREAKER_FAILURES):
+        guard.record("slow.test", status_code=503)
+    monkeypatch.setattr(executor_module, "get_host_guard", lambda: guard)
+    source = _SlowSource(delay=0.01)
+    executor = ScrapeExecutor(max_concurrency=2, per_host_concurrency=1)
+
+    outcomes = list(executor.stream([_task("http://slow.test/0"), _task("http://fast.test/0")], {"generic": source}))
+    assert [(o.index, o.error) for o in outcomes] == [
+        (0, "generic: skipped, slow.test is failing (circuit open)"),
+        (1, None),
+    ]
+    assert source.peak == {"fast.test": 1}
+    assert executor.run_calls([("slow.test", lambda: "x"), ("fast.test", lambda: "y")]) == [None, "y"]
@@ -0,0 +1,19 @@
+import logging
+
+from app.sources import http
+
+
+def test_http2_without_h2_falls_back_to_http1(monkeypatch, caplog, http_server):
+    monkeypatch.setattr(http, "h2", None)
+    http_server.routes["/page"] = (200, "text/html; charset=utf-8", b"<p>hello</p>")
+
+    with caplog.at_level(logging.WARNING, logger=http.__name__):
+        client = http.HttpClient(http2=True)
+    try:
+        assert client.http2 is False
+        assert "HTTP/1.1" in caplog.text
+        resp = client.get(f"{http_server.base_url}/page")
+        assert resp.status_code == 200
+        assert resp.content == b"<p>hello</p>"
+    finally:
+        client.close()
@@ -0,0 +1,81 @@
+import asyncio
+import math
+import statistics
+import time
+
+import httpx
+import pytest
+
+from app.core.workers import PipelineWorkerPool
+from app.main import app
+from app.routes import research
+
+USERS = 20
+PIPELINE_SECONDS = 0.1
+TOPICS = {"prompt": "AI tools"}
+
+
+def _slow_topics(**kwargs) -> dict:
+    time.sleep(PIPELINE_SECONDS)  # a blocking pipeline, as the real one is
+    return {"topics": []}
+
+
+def _percentile(values: list[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(share * len(ordered)) - 1)]
+
+
+async def _load() -> tuple[list[float], list[float]]:
+    """Send USERS concurrent /api/topics requests, probing /health meanwhile; returns both latency lists."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def timed(method: str, path: str, **kwargs) -> float:
+            started = time.perf_counter()
+            resp = await client.request(method, path, **kwargs)
+            assert resp.status_code == 200, resp.text
+            return time.perf_counter() - started
+
+        async def probe_health() -> list[float]:
+            latencies = []
+            while not requests_done.is_set():
+                latencies.append(await timed("GET", "/health"))
+                await asyncio.sleep(0.02)
+            return latencies
+
+        requests_done = asyncio.Event()
+        prober = asyncio.ensure_future(probe_health())
+        latencies = await asyncio.gather(*(timed("POST", "/api/topics", json=TOPICS) for _ in range(USERS)))
+        requests_done.set()
+        return list(latencies), await prober
+
+
+@pytest.fixture
+def slow_pipeline(monkeypatch):
+    monkeypatch.setattr(research, "run_topics_pipeline", _slow_topics)
+
+    def with_workers(workers: int) -> tuple[list[float], list[float]]:
+        pool = PipelineWorkerPool(workers=workers, queue_depth=USERS)
+        monkeypatch.setattr(research, "get_worker_pool", lambda: pool)
+        return asyncio.run(_load())
+
+    return with_workers
+
+
+def test_latency_under_concurrent_users_scales_with_workers(slow_pipeline):
+    serialized, _ = slow_pipeline(1)
+    latencies, health = slow_pipeline(4)
+    p50, p99 = statistics.median(latencies), _percentile(latencies, 0.99)
+    base_p50, base_p99 = statistics.median(serialized), _percentile(serialized, 0.99)
+    print(
+        f"\n{USERS} users, {PIPELINE_SECONDS * 1000:.0f}ms pipeline: 4 workers p50 {p50 * 1000:.0f}ms "
+        f"p99 {p99 * 1000:.0f}ms; serialized p50 {base_p50 * 1000:.0f}ms p99 {base_p99 * 1000:.0f}ms; "
+        f"/health max {max(health) * 1000:.1f}ms over {len(health)} probes"
+    )
+
+    # One worker runs the 20 requests back to back; four run them in five waves.
+    assert base_p99 >= USERS * PIPELINE_SECONDS * 0.9
+    assert p99 < math.ceil(USERS / 4) * PIPELINE_SECONDS + 0.3
+    assert p99 < base_p99 / 2
+    # The event loop never blocks on a pipeline, so health checks answer while they run.
+    assert len(health) >= 3
+    assert max(health) < 0.1
@@ -0,0 +1,39 @@
+import time
+
+import pytest
+
+from app.sources import parsing
+from app.sources.parsing import ParsingService, parse_generic_html
+
+
+def _hang(content: bytes, url: str, encoding=None) -> list[dict]:
+    time.sleep(60)
+    return []
+
+
+def _echo(content: bytes, url: str, encoding=None) -> list[dict]:
+    return [{"url": url, "size": len(content)}]
+
+
+def test_timed_out_parse_frees_the_worker():
+    service = ParsingService(workers=1, timeout=1)
+    try:
+        service.warm_up()
+        with pytest.raises(parsing.TimeoutError):
+            service.parse(_hang, b"", "https://example.com/slow")
+        # The only worker was hung for a minute; a recycled pool serves the next page long before that.
+        # Starting the new worker process may take over a second on a loaded machine, hence the longer timeout.
+        service.timeout = 30
+        started = time.monotonic()
+        assert service.parse(_echo, b"abc", "https://example.com/ok") == [{"url": "https://example.com/ok", "size": 3}]
+        assert time.monotonic() - started < 30
+    finally:
+        service.shutdown()
+
+
+def test_inline_parsing_without_workers():
+    html = b"<html><head><title>T</title></head><body><h1>Head</h1><p>Body text long enough to count as a paragraph.</p></body></html>"
+    [item] = ParsingService(workers=0).parse(parse_generic_html, html, "https://example.com/")
+    assert item["title"] == "T"
+    assert item["raw_metadata"]["headings"] == ["Head"]
+    assert "Body text long enough to count as a paragraph." in item["extracted_text"]
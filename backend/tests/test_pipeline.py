@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from app.core import markdown, pipeline
+from app.sources.base import ContentItem, ContentSource
+
+KEYWORDS = ["launch"]
+
+
+class _FastSource(ContentSource):
+    source_name = "youtube"
+
+    def scrape(self, url: str, keywords: list[str], time_window: str = "7d") -> list[ContentItem]:
+        return [
+            ContentItem(
+                id=f"v{i}", source="youtube", url=f"https://www.youtube.com/watch?v=video{i:05d}",
+                title=f"launch day recap part {i}", published_at="3 hours ago", engagement={"views": 2_000_000},
+            )
+            for i in range(10)
+        ]
+
+
+class _SlowSource(ContentSource):
+    source_name = "reddit"
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def scrape(self, url: str, keywords: list[str], time_window: str = "7d") -> list[ContentItem]:
+        self.release.wait(5)
+        return []
+
+
+@pytest.fixture
+def topics_run(monkeypatch):
+    slow = _SlowSource()
+    plan = [
+        {"source": "youtube", "url": "", "keywords": KEYWORDS, "time_window": "7d"},
+        {"source": "reddit", "url": "", "keywords": KEYWORDS, "time_window": "7d"},
+    ]
+    monkeypatch.setattr(pipeline, "get_corpus", lambda: None)
+    monkeypatch.setattr(pipeline, "perceive", lambda *args, **kwargs: {})
+    monkeypatch.setattr(pipeline, "reason", lambda *args: {"scrape_plan": plan, "all_keywords": KEYWORDS})
+    monkeypatch.setattr(pipeline, "_build_source_map", lambda: {"youtube": _FastSource(), "reddit": slow, "generic": slow})
+    monkeypatch.setattr(markdown, "generate_topics", lambda **kwargs: "1. Launch")
+    yield slow
+    slow.release.set()
+
+
+def test_topics_report_sources_skipped_by_early_stopping(topics_run, monkeypatch):
+    monkeypatch.setattr(pipeline, "TOPICS_GOOD_ENOUGH_SCORE", 0.65)
+    result = pipeline.run_topics_pipeline([], "launch")
+    assert result["cut_off_sources"] == ["reddit"]
+    assert result["errors"] == ["reddit: not awaited, enough strong candidates already ranked"]
+    assert result["context_snapshot"].count("launch day recap") == 10
+
+
+def test_topics_wait_for_every_source_when_early_stopping_is_off(topics_run, monkeypatch):
+    monkeypatch.setattr(pipeline, "TOPICS_GOOD_ENOUGH_SCORE", 0)
+    topics_run.release.set()
+    result = pipeline.run_topics_pipeline([], "launch")
+    assert result["cut_off_sources"] == [] and result["errors"] == []
@@ -0,0 +1,137 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core import ranking
+from app.core.ranking import TopKRanker, _compute_score, rank_items, score_items
+from app.sources.base import ContentItem
+
+WORDS = ["ai", "tools", "AI", "news", "gpt-4", "café", "İstanbul", "a.b", "(x)", "c++", "lorem", "ipsum"]
+KEYWORDS = ["ai", "ai tools", "tools", "AI Tools news", "gpt", "café", "İstanbul", "", "news", "c++", "a.b", "(x)"]
+DATES = [
+    None, "", "2 days ago", "12 days ago", "1 week ago", "3 hours ago", "5 months ago", "2 years ago",
+    "2024-05-01T00:00:00Z", "2024-05-01", "garbage", "Streamed 1 day ago",
+]
+# Values on and around every engagement tier boundary.
+VIEWS = [0, 99, 100, 999, 1000, 9999, 10_000, 100_000, 999_999, 1_000_000]
+REDDIT = [0, 9, 10, 99, 100, 499, 500, 999, 1000, 4999, 5000]
+
+
+def _text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12)))
+
+
+def _item(rng: random.Random, i: int) -> ContentItem:
+    return ContentItem(
+        id=str(i),
+        source=rng.choice(["youtube", "reddit", "generic"]),
+        title=_text(rng),
+        extracted_text=_text(rng),
+        published_at=rng.choice(DATES + [datetime.now(timezone.utc).isoformat()]),
+        engagement={"views": rng.choice(VIEWS), "score": rng.choice(REDDIT), "comments": rng.choice([0, 1, 3, 50])},
+    )
+
+
+def _keywords(rng: random.Random) -> list[str]:
+    keywords = rng.sample(KEYWORDS, rng.randint(0, 6))
+    if keywords and rng.random() < 0.3:
+        keywords.append(keywords[0])  # repeated keywords count once per occurrence
+    return keywords
+
+
+def _reference_rank(items: list[ContentItem], keywords: list[str], n: int) -> list[tuple[str, float]]:
+    scored = [(item.id, round(_compute_score(item, keywords), 4)) for item in items]
+    return sorted(scored, key=lambda entry: entry[1], reverse=True)[:n]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_scores_match_per_item_reference(seed):
+    rng = random.Random(seed)
+    for _ in range(60):
+        items = [_item(rng, i) for i in range(rng.randint(0, 60))]
+        keywords = _keywords(rng)
+        expected = [round(_compute_score(item, keywords), 4) for item in items]
+        assert score_items([item.model_copy() for item in items], keywords).tolist() == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rank_items_matches_reference_order(seed):
+    rng = random.Random(seed)
+    for _ in range(60):
+        items = [_item(rng, i) for i in range(rng.randint(0, 60))]
+        keywords = _keywords(rng)
+        n = rng.randint(0, 20)
+        ranked = rank_items([item.model_copy() for item in items], keywords, n, relevance="substring")
+        assert [(item.id, item.relevance_score) for item in ranked] == _reference_rank(items, keywords, n)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_top_k_ranker_matches_ranking_everything_at_once(seed):
+    rng = random.Random(seed)
+    for _ in range(40):
+        batches = [[_item(rng, b * 100 + j) for j in range(rng.randint(0, 30))] for b in range(rng.randint(1, 5))]
+        keywords = _keywords(rng)
+        n = rng.randint(0, 15)
+        everything = [item for batch in batches for item in batch]
+
+        ranker = TopKRanker(keywords, n, relevance="substring")
+        # Batches finish in any order; ``order`` restores plan order on ties.
+        for order in rng.sample(range(len(batches)), len(batches)):
+            ranker.add([item.model_copy() for item in batches[order]], order=order)
+        assert [item.id for item in ranker.results()] == [i for i, _ in _reference_rank(everything, keywords, n)]
+
+
+def test_top_k_indices_breaks_ties_by_lower_index():
+    scores = ranking.np.array([0.5, 0.7, 0.5, 0.7, 0.1])
+    assert ranking.top_k_indices(scores, 3) == [1, 3, 0]
+    assert ranking.top_k_indices(scores, 0) == []
+    assert ranking.top_k_indices(scores, 10) == [1, 3, 0, 2, 4]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bm25_ranker_does_not_depend_on_finish_order(seed):
+    rng = random.Random(seed)
+    for _ in range(40):
+        batches = [[_item(rng, b * 100 + j) for j in range(rng.randint(0, 30))] for b in range(rng.randint(1, 5))]
+        keywords = _keywords(rng)
+        n = rng.randint(0, 15)
+        everything = [item.model_copy() for batch in batches for item in batch]
+        expected = [(item.id, item.relevance_score) for item in rank_items(everything, keywords, n, relevance="bm25")]
+
+        ranker = TopKRanker(keywords, n, relevance="bm25")
+        for order in rng.sample(range(len(batches)), len(batches)):
+            ranker.add([item.model_copy() for item in batches[order]], order=order)
+        assert not ranker.full_above(0.0)
+        assert [(item.id, item.relevance_score) for item in ranker.results()] == expected
+
+
+def test_bm25_scores_use_statistics_of_every_batch():
+    keywords = ["rust"]
+    common = [ContentItem(id=f"c{i}", source="generic", title="rust compiler news", extracted_text="") for i in range(5)]
+    rare = ContentItem(id="r", source="generic", title="rust compiler news", extracted_text="")
+
+    early = TopKRanker(keywords, 10, relevance="bm25")
+    early.add([rare], order=0)
+    early.add(common, order=1)
+    late = TopKRanker(keywords, 10, relevance="bm25")
+    late.add(common, order=1)
+    late.add([rare], order=0)
+    # Identical texts score alike whichever batch arrived first, and plan order breaks the tie.
+    assert [(i.id, i.relevance_score) for i in early.results()] == [(i.id, i.relevance_score) for i in late.results()]
+    assert early.results()[0].id == "r"
+
+
+def test_evicted_item_regains_its_slot_when_its_engagement_grows():
+    keywords = ["ai"]
+    strong = ContentItem(id="strong", source="youtube", title="ai", engagement={"views": 50_000})
+    weak = ContentItem(id="weak", source="youtube", title="ai", engagement={"views": 10})
+    ranker = TopKRanker(keywords, 1, relevance="substring")
+    ranker.add([weak], order=0)
+    ranker.add([strong], order=1)
+    assert [item.id for item in ranker.results()] == ["strong"]
+
+    # Duplicates merged into the evicted item push it past the one holding the slot.
+    weak.engagement["views"] = 2_000_000
+    ranker.update([weak])
+    assert [item.id for item in ranker.results()] == ["weak"]
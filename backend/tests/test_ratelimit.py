@@ -0,0 +1,131 @@
+import threading
+
+import pytest
+
+from app.sources import ratelimit
+from app.sources.ratelimit import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, HostGuard, RateLimitedError, TokenBucket,
+)
+
+
+class _Clock:
+    """Stands in for the ``time`` module: ``sleep`` advances ``monotonic`` instead of blocking."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    return clock
+
+
+def test_token_bucket_bursts_then_queues_callers_at_the_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.reserve(max_wait=5) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Each later caller waits behind the reservations before it.
+    assert [bucket.reserve(max_wait=5) for _ in range(2)] == [0.5, 1.0]
+    # A wait past max_wait is refused without taking a token.
+    assert bucket.reserve(max_wait=1.2) is None
+    assert bucket.reserve(max_wait=1.5) == 1.5
+
+    clock.now += 10  # refills to the burst, never beyond it
+    assert [bucket.reserve(max_wait=0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve(max_wait=0) is None
+
+
+def test_breaker_opens_after_consecutive_failures_and_recovers_through_one_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure("boom")
+    breaker.record_failure("boom")
+    breaker.record_success()  # a success resets the count
+    breaker.record_failure("boom")
+    breaker.record_failure("boom")
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure("boom")
+    assert breaker.state == OPEN and not breaker.allow()
+    assert breaker.retry_in() == 30
+
+    clock.now += 30
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure("still down")  # a failed probe reopens at once
+    assert breaker.state == OPEN and breaker.retry_in() == 30
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0 and breaker.allow()
+
+
+def test_half_open_breaker_grants_a_single_probe_across_threads(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1)
+    breaker.record_failure("boom")
+    clock.now += 1
+    barrier = threading.Barrier(16)
+    granted = []
+
+    def attempt():
+        barrier.wait()
+        granted.append(breaker.allow())
+
+    threads = [threading.Thread(target=attempt) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(granted) == [False] * 15 + [True]
+
+
+def test_retry_after_keeps_the_breaker_open_longer(clock):
+    guard = HostGuard()
+    for _ in range(ratelimit.BREAKER_FAILURES):
+        guard.record("api.test", status_code=429, retry_after=300)
+    assert guard.is_open("api.test")
+    with pytest.raises(CircuitOpenError) as raised:
+        guard.acquire("api.test")
+    assert raised.value.retry_in == 300
+
+    clock.now += ratelimit.BREAKER_RESET_SECONDS
+    assert guard.is_open("api.test")
+    clock.now += 300 - ratelimit.BREAKER_RESET_SECONDS
+    assert not guard.is_open("api.test")
+    guard.acquire("api.test")
+
+
+def test_abandoned_or_rate_limited_probe_is_handed_back(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "HOST_RATE_LIMITS", {"api.test": (1.0, 1)})
+    guard = HostGuard(max_wait=0)
+    for _ in range(ratelimit.BREAKER_FAILURES):
+        guard.record("api.test", status_code=503)
+    clock.now += ratelimit.BREAKER_RESET_SECONDS
+
+    guard.acquire("api.test")  # the probe
+    with pytest.raises(CircuitOpenError):
+        guard.acquire("api.test")
+    guard.abandon("api.test")  # e.g. our own deadline cut the probe short
+    # The next probe is granted, but the bucket has no token left, so that slot is handed back too.
+    with pytest.raises(RateLimitedError):
+        guard.acquire("api.test")
+    clock.now += 1
+    guard.acquire("api.test")
+    guard.record("api.test", status_code=200)
+    assert guard.stats()["api.test"]["state"] == CLOSED
+
+
+def test_client_errors_do_not_count_against_the_host(clock):
+    guard = HostGuard()
+    for _ in range(ratelimit.BREAKER_FAILURES * 2):
+        guard.record("api.test", status_code=404)
+    assert not guard.is_open("api.test")
+    guard.record("api.test", error=ConnectionError("reset"))
+    assert guard.stats()["api.test"]["consecutive_failures"] == 1
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import pipeline
+from app.core.workers import PipelineWorkerPool
+from app.main import app
+from app.routes import research
+
+SCRIPT = {"topic": "AI tools"}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = PipelineWorkerPool(workers=1, queue_depth=0)
+    monkeypatch.setattr(research, "get_worker_pool", lambda: pool)
+    return pool
+
+
+def test_script_stream_runs_on_the_worker_pool(pool, monkeypatch):
+    threads = []
+
+    def fake_stream(**kwargs):
+        threads.append(threading.current_thread().name)
+        yield "token", {"text": "Hello"}
+        yield "done", {"stored_record_id": "r1"}
+
+    monkeypatch.setattr(research, "stream_script_pipeline", fake_stream)
+    resp = TestClient(app).post("/api/script/stream", json=SCRIPT)
+    assert resp.status_code == 200
+    assert 'event: token\ndata: {"text": "Hello"}' in resp.text
+    assert "event: done" in resp.text
+    assert threads and threads[0].startswith("pipeline")
+
+
+def test_script_stream_gets_503_when_the_pool_is_full(pool, monkeypatch):
+    release = threading.Event()
+    pool.submit(release.wait, 10)
+    try:
+        monkeypatch.setattr(research, "stream_script_pipeline", pipeline.stream_script_pipeline)
+        resp = TestClient(app).post("/api/script/stream", json=SCRIPT)
+        assert resp.status_code == 503
+    finally:
+        release.set()
+
+
+def test_script_stream_reports_pipeline_errors_as_events(pool, monkeypatch):
+    def failing(**kwargs):
+        yield "token", {"text": "partial"}
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(research, "stream_script_pipeline", failing)
+    resp = TestClient(app).post("/api/script/stream", json=SCRIPT)
+    assert "event: error" in resp.text and "boom" in resp.text
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+
+import pytest
+
+from app.core import storage
+
+
+@pytest.fixture
+def history_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(storage, "HISTORY_FILE", str(tmp_path / "history.json"))
+    monkeypatch.setattr(storage, "_conn", None)
+    yield
+    if storage._conn is not None:
+        storage._conn.close()
+
+
+def test_concurrent_writers_all_commit(history_db):
+    threads, per_thread = 8, 50
+    errors = []
+
+    def write(worker: int):
+        for i in range(per_thread):
+            try:
+                storage.save_record({"inputs": {"prompt": f"{worker}-{i}"}, "selected_results": [], "total_scraped": 0})
+            except Exception as e:
+                errors.append(e)
+
+    workers = [threading.Thread(target=write, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    summaries, _ = storage.list_record_summaries(limit=threads * per_thread + 1)
+    assert len(summaries) == threads * per_thread
+
+
+def test_failed_write_rolls_back(history_db, monkeypatch):
+    storage.save_record({"inputs": {"prompt": "kept"}})
+
+    def broken_summary(record):
+        raise ValueError("broken")
+
+    # Fails after the record row was inserted, so the rollback must take it back out.
+    with monkeypatch.context() as patch:
+        patch.setattr(storage, "_summary_row", broken_summary)
+        with pytest.raises(ValueError):
+            storage.save_record({"inputs": {"prompt": "broken"}})
+    # The shared connection must be usable again after the rollback.
+    storage.save_record({"inputs": {"prompt": "after"}})
+    prompts = [s["prompt"] for s in storage.list_record_summaries()[0]]
+    assert sorted(prompts) == ["after", "kept"]
+    assert storage._get_conn().execute("SELECT COUNT(*) FROM records").fetchone()[0] == 2
+
+
+def test_cursor_pages_cover_every_record(history_db):
+    for i in range(7):
+        storage.save_record({"inputs": {"prompt": f"p{i}"}})
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = storage.list_record_summaries(limit=3, before=cursor)
+        seen.extend(summary["prompt"] for summary in page)
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(f"p{i}" for i in range(7))
+
+
+def test_legacy_json_history_migrates_despite_missing_and_null_fields(history_db):
+    legacy = [
+        {"id": "full", "created_at": "2024-01-03T00:00:00+00:00",
+         "inputs": {"prompt": "p", "category": "tech"}, "selected_results": [{}, {}], "total_scraped": 9},
+        {"id": "script", "created_at": "2024-01-02T00:00:00+00:00", "inputs": {"topic": "t", "prompt": None}},
+        {"id": "nulls", "created_at": "2024-01-01T00:00:00+00:00",
+         "inputs": {"topic": None, "category": None}, "selected_results": None, "total_scraped": None},
+        {"id": "no-inputs", "created_at": "2023-12-31T00:00:00+00:00", "inputs": None},
+        {"inputs": {"prompt": "no id or date"}},
+    ]
+    with open(storage.HISTORY_FILE, "w") as f:
+        json.dump(legacy, f)
+
+    summaries, _ = storage.list_record_summaries()
+    by_id = {s["id"]: (s["prompt"], s["category"], s["num_results"], s["total_scraped"]) for s in summaries}
+    assert len(by_id) == 5
+    assert by_id["full"] == ("p", "tech", 2, 9)
+    assert by_id["script"] == ("t", "", 0, 0)
+    assert by_id["nulls"] == ("", "", 0, 0)
+    assert by_id["no-inputs"] == ("", "", 0, 0)
+    assert storage.get_record_by_id("nulls")["inputs"] == {"topic": None, "category": None}
+    assert not os.path.exists(storage.HISTORY_FILE) and os.path.exists(storage.HISTORY_FILE + ".migrated")
@@ -0,0 +1,75 @@
+import pytest
+
+from app.core import cache
+from app.core.cache import TieredCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def _rows(path: str, namespace: str) -> list[str]:
+    rows = cache._shared_conn(path).execute(
+        "SELECT key FROM entries WHERE namespace = ? ORDER BY key", (namespace,),
+    ).fetchall()
+    return [row["key"] for row in rows]
+
+
+def test_values_round_trip_through_both_tiers(path):
+    tc = TieredCache("ns", ttl=60, max_entries=1, path=path)
+    tc.set("a", {"n": 1})
+    tc.set("b", [1, 2])
+    # "a" fell out of the one-entry memory tier, so it comes back from disk.
+    assert tc.get("a") == {"n": 1}
+    assert tc.get("a") == {"n": 1}
+    assert tc.stats() == {"memory_hits": 1, "disk_hits": 1, "misses": 0, "memory_entries": 1}
+    # Callers get copies, so mutating a result never changes the cache.
+    tc.get("a")["n"] = 2
+    assert tc.get("a") == {"n": 1}
+
+
+def test_expired_entries_miss_and_are_deleted_on_read(path):
+    tc = TieredCache("ns", ttl=60, path=path)
+    tc.set("old", "value", ttl=-1)
+    tc.set("new", "value")
+    assert tc.get("old") is None
+    assert _rows(path, "ns") == ["new"]
+    assert TieredCache("ns", ttl=60, path=path).get("new") == "value"
+
+
+def test_purge_expired_drops_expired_rows_of_its_own_namespace(path):
+    tc = TieredCache("ns", ttl=60, path=path)
+    other = TieredCache("other", ttl=60, path=path)
+    for key in "abc":
+        tc.set(key, key, ttl=-1)
+        other.set(key, key, ttl=-1)
+    tc.set("live", 1)
+    tc.purge_expired()
+    assert _rows(path, "ns") == ["live"]
+    assert _rows(path, "other") == ["a", "b", "c"]
+
+
+def test_writes_sweep_the_disk_tier_down_to_its_bound(path, monkeypatch):
+    monkeypatch.setattr(cache, "_SWEEP_EVERY", 8)
+    tc = TieredCache("ns", ttl=60, path=path, max_disk_entries=5)
+    for i in range(7):
+        tc.set(f"k{i}", i, ttl=60 + i)
+    assert len(_rows(path, "ns")) == 7  # no sweep yet
+    tc.set("k7", 7, ttl=67)
+    # The entries expiring last are kept.
+    assert _rows(path, "ns") == ["k3", "k4", "k5", "k6", "k7"]
+
+
+def test_invalidate_one_key_or_the_whole_namespace(path):
+    tc = TieredCache("ns", ttl=60, path=path)
+    other = TieredCache("other", ttl=60, path=path)
+    for key in "ab":
+        tc.set(key, key)
+    other.set("a", "kept")
+
+    tc.invalidate("a")
+    assert tc.get("a") is None and tc.get("b") == "b"
+    tc.invalidate()
+    assert tc.get("b") is None and _rows(path, "ns") == []
+    assert other.get("a") == "kept"
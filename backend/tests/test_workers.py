@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.errors import ServiceBusyError
+from app.core.workers import PipelineWorkerPool
+
+
+def _blocking(release: threading.Event, started: threading.Semaphore) -> str:
+    started.release()
+    release.wait(10)
+    return "done"
+
+
+def test_load_queues_up_to_capacity_then_rejects():
+    pool = PipelineWorkerPool(workers=2, queue_depth=3)
+    release, started = threading.Event(), threading.Semaphore(0)
+
+    async def burst():
+        tasks = [asyncio.ensure_future(pool.run(_blocking, release, started)) for _ in range(9)]
+        await asyncio.sleep(0)
+        # Every request past workers + queue_depth is turned away at once, not queued.
+        rejected = [t for t in tasks if t.done() and isinstance(t.exception(), ServiceBusyError)]
+        assert len(rejected) == 4
+        for _ in range(2):
+            await asyncio.to_thread(started.acquire, True, 5)
+        assert pool.stats() == {"workers": 2, "queue_depth": 3, "running": 2, "queued": 3}
+
+        release.set()
+        accepted = [t for t in tasks if t not in rejected]
+        assert await asyncio.gather(*accepted) == ["done"] * 5
+        assert pool.stats()["running"] == 0 and pool.stats()["queued"] == 0
+
+    asyncio.run(burst())
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_work_finishes():
+    pool = PipelineWorkerPool(workers=1, queue_depth=0)
+    release, started = threading.Event(), threading.Semaphore(0)
+
+    async def cancel_while_running():
+        task = asyncio.ensure_future(pool.run(_blocking, release, started))
+        await asyncio.to_thread(started.acquire, True, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # The worker thread is still busy, so the pool must still be full.
+        assert pool.stats()["running"] == 1
+        with pytest.raises(ServiceBusyError):
+            await pool.run(_blocking, release, started)
+
+        release.set()
+        for _ in range(50):
+            if pool.stats()["running"] == 0:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.stats()["running"] == 0
+
+    asyncio.run(cancel_while_running())
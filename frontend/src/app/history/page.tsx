@@ -14,22 +14,40 @@ interface HistoryItem {
     total_scraped: number;
 }
 
+// /api/history returns one page at a time; next_cursor is null on the last page.
+const PAGE_SIZE = 50;
+
 export default function HistoryPage() {
     const [history, setHistory] = useState<HistoryItem[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState<string | null>(null);
 
+    const fetchPage = async (before: string | null) => {
+        const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+        if (before) params.set("before", before);
+        const res = await fetch(`${API}/history?${params}`);
+        if (!res.ok) throw new Error("Failed to load history");
+        const data = await res.json();
+        setHistory((prev) => (before ? [...prev, ...(data.history || [])] : data.history || []));
+        setNextCursor(data.next_cursor ?? null);
+    };
+
     useEffect(() => {
-        fetch(`${API}/history`)
-            .then((res) => {
-                if (!res.ok) throw new Error("Failed to load history");
-                return res.json();
-            })
-            .then((data) => setHistory(data.history || []))
+        fetchPage(null)
             .catch((err) => setError(err.message))
             .finally(() => setLoading(false));
     }, []);
 
+    const loadMore = () => {
+        if (!nextCursor || loadingMore) return;
+        setLoadingMore(true);
+        fetchPage(nextCursor)
+            .catch((err) => setError(err.message))
+            .finally(() => setLoadingMore(false));
+    };
+
     const formatDate = (iso: string) => {
         try {
             return new Date(iso).toLocaleDateString("en-US", {
@@ -105,6 +123,14 @@ export default function HistoryPage() {
                         </tbody>
                     </table>
                 )}
+
+                {!loading && !error && nextCursor && (
+                    <div style={{ display: "flex", justifyContent: "center", marginTop: 16 }}>
+                        <button className="btn btn-secondary" onClick={loadMore} disabled={loadingMore}>
+                            {loadingMore ? "Loading..." : "Load more"}
+                        </button>
+                    </div>
+                )}
             </div>
         </>
     );